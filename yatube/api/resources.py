@@ -0,0 +1,98 @@
+"""Поля ресурсов API и выборка только нужных столбцов.
+
+Поле ресурса — это столбцы для .only() и функция, достающая значение
+из объекта. По ?fields= запрос выбирает только столбцы перечисленных
+полей и присоединяет только те связи, что им нужны.
+"""
+from operator import attrgetter
+
+
+class InvalidFields(Exception):
+    pass
+
+
+def _related(name, attribute):
+    def get(obj):
+        related = getattr(obj, name)
+        return None if related is None else getattr(related, attribute)
+    return get
+
+
+def _image(post):
+    return post.image.url if post.image else None
+
+
+POST = {
+    'id': (('id',), attrgetter('id')),
+    'text': (('text',), attrgetter('text')),
+    'pub_date': (('pub_date',), attrgetter('pub_date')),
+    'updated': (('updated',), attrgetter('updated')),
+    'author': (('author__username',), _related('author', 'username')),
+    'group': (('group__slug',), _related('group', 'slug')),
+    'image': (('image',), _image),
+    'comments_count': (('comments_count',), attrgetter('comments_count')),
+}
+COMMENT = {
+    'id': (('id',), attrgetter('id')),
+    'post': (('post',), attrgetter('post_id')),
+    'author': (('author__username',), _related('author', 'username')),
+    'text': (('text',), attrgetter('text')),
+    'created': (('created',), attrgetter('created')),
+}
+GROUP = {
+    'id': (('id',), attrgetter('id')),
+    'title': (('title',), attrgetter('title')),
+    'slug': (('slug',), attrgetter('slug')),
+    'description': (('description',), attrgetter('description')),
+}
+PROFILE = {
+    'username': (('username',), attrgetter('username')),
+    'first_name': (('first_name',), attrgetter('first_name')),
+    'last_name': (('last_name',), attrgetter('last_name')),
+    'posts_count': (
+        ('profile__posts_count',), _related('profile', 'posts_count')
+    ),
+    'followers_count': (
+        ('profile__followers_count',),
+        _related('profile', 'followers_count'),
+    ),
+    'following_count': (
+        ('profile__following_count',),
+        _related('profile', 'following_count'),
+    ),
+}
+
+
+def parse_fields(resource, value):
+    """Имена полей из ?fields=a,b; без параметра — все поля."""
+    if not value:
+        return list(resource)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource]
+    if unknown or not names:
+        raise InvalidFields(', '.join(unknown))
+    return names
+
+
+def select(queryset, resource, names, required=()):
+    """Запрос только за столбцами полей names и столбцами required.
+
+    select_related исходного запроса заменяется связями, нужными
+    этим полям: у отложенной связи select_related быть не может.
+    Запросам от related-менеджеров в required нужен внешний ключ
+    на владельца, иначе его догрузят по запросу на объект.
+    """
+    columns = set(required)
+    for name in names:
+        columns.update(resource[name][0])
+    relations = {
+        column.rsplit('__', 1)[0] for column in columns if '__' in column
+    }
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*columns)
+
+
+def serialize(obj, resource, names):
+    return {name: resource[name][1](obj) for name in names}
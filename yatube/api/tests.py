@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.views import POSTS_ON_PAGE
+
+AMOUNT_TEST_POSTS = 13
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(AMOUNT_TEST_POSTS):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост №{number}',
+                group=cls.group,
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Тестовый комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_fields_limit_columns(self):
+        """?fields= отдаёт только указанные поля и не выбирает
+        лишние столбцы"""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(url, {'fields': 'id,author'})
+        self.assertEqual(
+            response.json(), {'id': self.post.id, 'author': 'TestAuthor'}
+        )
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('posts_group', sql)
+        response = self.client.get(url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_cursor_pagination(self):
+        """Страницы по курсору покрывают все посты без повторов"""
+        url = reverse('api:group_posts', kwargs={'slug': self.group.slug})
+        response = self.client.get(url, {'fields': 'id'})
+        data = response.json()
+        self.assertEqual(len(data['results']), POSTS_ON_PAGE)
+        self.assertIsNone(data['previous'])
+        self.assertIn('fields=id', data['next'])
+        with self.assertNumQueries(2):
+            rest = self.client.get(data['next']).json()
+        ids = [post['id'] for post in data['results'] + rest['results']]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('-pub_date', '-id')
+                      .values_list('id', flat=True))
+        )
+        self.assertIsNone(rest['next'])
+        response = self.client.get(url, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_etag_conditional_response(self):
+        """Повтор запроса с If-None-Match получает 304, после
+        изменения данных — новый ответ"""
+        url = reverse('api:comment_list', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.json()['results'][0]['text'], 'Тестовый комментарий'
+        )
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_profile_and_follow_feed(self):
+        """Профиль со счётчиками; лента подписок только для
+        авторизованных"""
+        response = self.client.get(reverse(
+            'api:profile_detail', kwargs={'username': 'TestAuthor'}
+        ))
+        self.assertEqual(response.json()['posts_count'], AMOUNT_TEST_POSTS)
+        self.assertEqual(response.json()['followers_count'], 1)
+        url = reverse('api:follow_feed')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        self.client.force_login(self.reader)
+        data = self.client.get(url, {'fields': 'id'}).json()
+        self.assertEqual(len(data['results']), POSTS_ON_PAGE)
+        self.assertEqual(
+            self.client.get(reverse(
+                'api:profile_detail', kwargs={'username': 'nobody'}
+            )).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
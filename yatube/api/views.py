@@ -0,0 +1,151 @@
+import hashlib
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from api.resources import (COMMENT, GROUP, POST, PROFILE, InvalidFields,
+                           parse_fields, select, serialize)
+from posts.models import Group, Post, User
+from posts.paginator import (COMMENT_ORDERING, POST_ORDERING, CursorPaginator,
+                             InvalidCursor)
+from posts.timeline import TIMELINE_ORDERING
+from posts.views import (POSTS_ON_PAGE, follow_post_list, group_post_list,
+                         index_posts, post_comments, profile_post_list)
+
+GROUP_ORDERING = ('id',)
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def _error(message, status):
+    return _json({'detail': message}, status)
+
+
+def api_view(view):
+    """Ответ JSON с ETag по содержимому; ошибки тоже отдаются в JSON.
+
+    Клиент с совпавшим If-None-Match получает 304 без тела.
+    """
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+        except Http404:
+            return _error('Не найдено.', 404)
+        except InvalidFields as error:
+            return _error(f'Неизвестные поля: {error}', 400)
+        except InvalidCursor:
+            return _error('Неверный курсор.', 400)
+        if response.status_code != 200:
+            return response
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response['ETag'] = etag
+        return get_conditional_response(
+            request, etag=etag, response=response
+        )
+    return wrapper
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def _page(request, queryset, resource, ordering, required):
+    """Страница по курсору: поля из ?fields=, столбцы сортировки
+    выбираются всегда, по ним строится курсор."""
+    names = parse_fields(resource, request.GET.get('fields'))
+    paginator = CursorPaginator(
+        select(queryset, resource, names, required), POSTS_ON_PAGE, ordering
+    )
+    page = paginator.page(request.GET.get('cursor'))
+    return _json({
+        'results': [serialize(obj, resource, names) for obj in page],
+        'next': _link(request, page.next_cursor),
+        'previous': _link(request, page.previous_cursor),
+    })
+
+
+def _detail(request, queryset, resource, **lookup):
+    names = parse_fields(resource, request.GET.get('fields'))
+    obj = get_object_or_404(select(queryset, resource, names), **lookup)
+    return _json(serialize(obj, resource, names))
+
+
+def _posts(request, queryset, *required):
+    return _page(
+        request, queryset, POST, POST_ORDERING, ('pub_date', 'id', *required)
+    )
+
+
+@api_view
+def post_list(request):
+    return _posts(request, index_posts())
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(request, Post.objects.all(), POST, id=post_id)
+
+
+@api_view
+def comment_list(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    return _page(
+        request, post_comments(post), COMMENT, COMMENT_ORDERING,
+        ('created', 'id', 'post'),
+    )
+
+
+@api_view
+def group_list(request):
+    return _page(
+        request, Group.objects.order_by(*GROUP_ORDERING), GROUP,
+        GROUP_ORDERING, ('id',),
+    )
+
+
+@api_view
+def group_detail(request, slug):
+    return _detail(request, Group.objects.all(), GROUP, slug=slug)
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('id', 'slug'), slug=slug)
+    return _posts(request, group_post_list(group), 'group')
+
+
+@api_view
+def profile_detail(request, username):
+    return _detail(request, User.objects.all(), PROFILE, username=username)
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(
+        User.objects.only('id', 'username'), username=username
+    )
+    return _posts(request, profile_post_list(author), 'author')
+
+
+@api_view
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        return _error('Нужна авторизация.', 401)
+    return _page(
+        request, follow_post_list(request.user), POST, TIMELINE_ORDERING,
+        ('pub_date', 'id'),
+    )
@@ -0,0 +1,31 @@
+"""Отдельный кэш на время замеров."""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+SQLITE_BACKEND = 'core.backends.cache.SQLiteCache'
+KEY_PREFIX = 'bench'
+
+
+@contextmanager
+def private_cache():
+    """Кэш во временном файле и с собственным префиксом ключей.
+
+    Команда bench работает на своей тестовой базе, поэтому не читает
+    кэш запущенного сервера и ничего в нём не меняет; файл удаляется
+    на выходе. seed пишет в настоящую базу и кэш берёт настоящий.
+    """
+    with tempfile.TemporaryDirectory(prefix='yatube-cache-') as directory:
+        caches = {}
+        for alias, params in settings.CACHES.items():
+            params = dict(params, KEY_PREFIX=KEY_PREFIX)
+            if params['BACKEND'] == SQLITE_BACKEND:
+                params['LOCATION'] = os.path.join(
+                    directory, f'{alias}.sqlite3'
+                )
+            caches[alias] = params
+        with override_settings(CACHES=caches):
+            yield
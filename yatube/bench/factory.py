@@ -0,0 +1,84 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+
+from posts import timeline
+from posts.counters import recount_all
+from posts.models import Comment, Follow, Group, Post, Profile, User
+
+WORDS = (
+    'пост', 'кот', 'утро', 'город', 'книга', 'дорога', 'музыка', 'море',
+    'работа', 'погода', 'друг', 'фото', 'идея', 'вечер', 'проект', 'код',
+)
+RECOUNT_BATCH_SIZE = 1000
+
+
+def _text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _ids(model):
+    return list(model.objects.order_by('pk').values_list('pk', flat=True))
+
+
+def seed(users, groups, posts, comments, follows, random_seed=0):
+    """Заполняет базу данными для замеров пачками bulk_create.
+
+    bulk_create не шлёт сигналы, поэтому профили, ленты подписок
+    и счётчики после вставки собираются отдельно.
+    """
+    rnd = random.Random(random_seed)
+    password = make_password(None)
+    User.objects.bulk_create(
+        User(username=f'bench{number}', password=password)
+        for number in range(users)
+    )
+    user_ids = _ids(User)
+    Profile.objects.bulk_create(
+        (Profile(user_id=user_id) for user_id in user_ids),
+        ignore_conflicts=True,
+    )
+    Group.objects.bulk_create(
+        Group(
+            title=f'Группа {number}',
+            slug=f'bench-{number}',
+            description=_text(rnd, 12),
+        )
+        for number in range(groups)
+    )
+    group_ids = _ids(Group) + [None]
+    Post.objects.bulk_create(
+        Post(
+            author_id=rnd.choice(user_ids),
+            group_id=rnd.choice(group_ids),
+            text=_text(rnd, rnd.randint(5, 60)),
+        )
+        for _ in range(posts)
+    )
+    post_ids = _ids(Post)
+    if post_ids:
+        Comment.objects.bulk_create(
+            Comment(
+                post_id=rnd.choice(post_ids),
+                author_id=rnd.choice(user_ids),
+                text=_text(rnd, rnd.randint(3, 20)),
+            )
+            for _ in range(comments)
+        )
+    pairs = {
+        tuple(rnd.sample(user_ids, 2))
+        for _ in range(follows if len(user_ids) > 1 else 0)
+    }
+    Follow.objects.bulk_create(
+        (Follow(user_id=user, author_id=author) for user, author in pairs),
+        ignore_conflicts=True,
+    )
+    timeline.rebuild()
+    recount_all(RECOUNT_BATCH_SIZE)
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids) - 1,
+        'posts': len(post_ids),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from bench.cache import private_cache
+from bench.factory import seed
+from bench.runner import SCENARIOS, git_revision, run_scenario, sample_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и пропускную способность основных страниц '
+        'на отдельной тестовой базе и печатает отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=list(SCENARIOS),
+            default=list(SCENARIOS),
+        )
+        parser.add_argument(
+            '--db-file',
+            help='Файл тестовой базы SQLite, по умолчанию временный.',
+        )
+        parser.add_argument(
+            '--debug', action='store_true',
+            help='Не отключать DEBUG (и debug_toolbar) на время замеров.',
+        )
+        parser.add_argument(
+            '--sqlite-defaults', action='store_true',
+            help=(
+                'Без SQLITE_PRAGMAS и BEGIN IMMEDIATE: замер «до» '
+                'для сравнения с настроенным SQLite.'
+            ),
+        )
+        parser.add_argument('--output', help='Записать отчёт в файл.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть не меньше 1.')
+        if options['sqlite_defaults']:
+            with override_settings(
+                SQLITE_PRAGMAS={}, SQLITE_TRANSACTION_MODE=None
+            ):
+                return self.bench(options)
+        return self.bench(options)
+
+    def bench(self, options):
+        temp_dir = None
+        if connection.vendor == 'sqlite':
+            # Общая база в памяти блокирует таблицы целиком и не ждёт
+            # освобождения, поэтому параллельные записи падают сразу.
+            db_file = options['db_file']
+            if not db_file:
+                temp_dir = tempfile.mkdtemp(prefix='yatube-bench-')
+                db_file = os.path.join(temp_dir, 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = db_file
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(DEBUG=options['debug']), private_cache():
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def run(self, options):
+        seeded = seed(
+            options['users'], options['groups'], options['posts'],
+            options['comments'], options['follows'], options['seed'],
+        )
+        data = sample_data(options['seed'])
+        scenarios = {}
+        for name in options['scenarios']:
+            if options['verbosity'] > 1:
+                self.stderr.write(f'{name}...')
+            scenarios[name] = run_scenario(
+                name, options['requests'], options['concurrency'], data,
+                options['warmup'], options['seed'],
+            )
+        return {
+            'revision': git_revision(),
+            'database': connection.vendor,
+            'debug': options['debug'],
+            'sqlite_tuning': not options['sqlite_defaults'],
+            'seed': seeded,
+            'scenarios': scenarios,
+        }
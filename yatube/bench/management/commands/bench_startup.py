@@ -0,0 +1,56 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bench.runner import git_revision
+from bench.startup import PROFILES, compare, run_profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запуск процесса и обработку запросов в профилях '
+        'настроек dev и prod и печатает отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--urls', nargs='+', default=['/about/author/', '/about/tech/'],
+            help='Страницы без обращений к базе.',
+        )
+        parser.add_argument(
+            '--profiles', nargs='+', choices=PROFILES, default=list(PROFILES),
+        )
+        parser.add_argument('--output', help='Записать отчёт в файл.')
+
+    def handle(self, *args, **options):
+        profiles = {}
+        for profile in options['profiles']:
+            if options['verbosity'] > 1:
+                self.stderr.write(f'{profile}...')
+            try:
+                profiles[profile] = run_profile(
+                    profile, settings.BASE_DIR, options['runs'],
+                    options['requests'], options['urls'],
+                )
+            except subprocess.CalledProcessError as exc:
+                raise CommandError(
+                    f'Профиль {profile}: {exc}\n{exc.stderr or ""}'
+                )
+        report = {
+            'revision': git_revision(),
+            'runs': options['runs'],
+            'requests': options['requests'],
+            'urls': options['urls'],
+            'profiles': profiles,
+        }
+        if set(PROFILES) <= set(profiles):
+            report['prod_vs_dev_percent'] = compare(profiles)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
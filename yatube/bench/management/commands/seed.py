@@ -0,0 +1,85 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bench.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетической соцсетью для оценки ёмкости: '
+        'подписчики по степенному закону, посты по закону Ципфа, '
+        'всплески комментариев под популярными постами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows-per-user', type=float, default=20)
+        parser.add_argument(
+            '--follower-exponent', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности авторов.',
+        )
+        parser.add_argument(
+            '--post-exponent', type=float, default=1.0,
+            help='Показатель закона Ципфа для частоты постов авторов.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределены посты.',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Строк в одной задаче процесса.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help=(
+                'Строк в одном INSERT и одной транзакции; '
+                'SQLite допускает не больше 500.'
+            ),
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--locale', default='ru_RU')
+        parser.add_argument(
+            '--skip-timelines', action='store_true',
+            help='Не собирать ленты подписок (rebuild_timelines позже).',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['chunk_size'] < 1:
+            raise CommandError(
+                '--processes и --chunk-size должны быть больше нуля.'
+            )
+        started = time.perf_counter()
+
+        def progress(name, done, total):
+            if options['verbosity'] > 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{name}: {done}/{total} ({elapsed:.0f} с)')
+
+        created = generate(
+            options['users'], options['groups'], options['posts'],
+            options['comments'], options['follows_per_user'],
+            follower_exponent=options['follower_exponent'],
+            post_exponent=options['post_exponent'],
+            days=options['days'],
+            processes=options['processes'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            locale=options['locale'],
+            timelines=not options['skip_timelines'],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{name}: {count}' for name, count in created.items())
+            + f' за {elapsed:.0f} с.'
+        ))
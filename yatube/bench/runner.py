@@ -0,0 +1,196 @@
+import math
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.urls import (ADD_COMMENT, FOLLOW_INDEX, GROUP_LIST, INDEX,
+                        POST_CREATE, POST_DETAIL, PROFILE)
+
+SAMPLE_SIZE = 1000
+MIXED_WRITE_SHARE = 0.2
+
+
+def _index(client, data, rnd):
+    return client.get(reverse(INDEX))
+
+
+def _group_posts(client, data, rnd):
+    slug = rnd.choice(data['group_slugs'])
+    return client.get(reverse(GROUP_LIST, kwargs={'slug': slug}))
+
+
+def _profile(client, data, rnd):
+    username = rnd.choice(data['usernames'])
+    return client.get(reverse(PROFILE, kwargs={'username': username}))
+
+
+def _post_detail(client, data, rnd):
+    post_id = rnd.choice(data['post_ids'])
+    return client.get(reverse(POST_DETAIL, kwargs={'post_id': post_id}))
+
+
+def _follow_index(client, data, rnd):
+    return client.get(reverse(FOLLOW_INDEX))
+
+
+def _post_create(client, data, rnd):
+    return client.post(
+        reverse(POST_CREATE), {'text': f'Замер {rnd.random()}'}
+    )
+
+
+def _add_comment(client, data, rnd):
+    post_id = rnd.choice(data['post_ids'])
+    return client.post(
+        reverse(ADD_COMMENT, kwargs={'post_id': post_id}),
+        {'text': f'Замер {rnd.random()}'},
+    )
+
+
+def _mixed(client, data, rnd):
+    if rnd.random() < MIXED_WRITE_SHARE:
+        return _add_comment(client, data, rnd)
+    return rnd.choice((_index, _post_detail))(client, data, rnd)
+
+
+SCENARIOS = {
+    'index': (_index, False),
+    'group_posts': (_group_posts, False),
+    'profile': (_profile, False),
+    'post_detail': (_post_detail, False),
+    'follow_index': (_follow_index, True),
+    'post_create': (_post_create, True),
+    'add_comment': (_add_comment, True),
+    'mixed': (_mixed, True),
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_data(random_seed=0):
+    """Случайные адреса для запросов: группы, авторы, посты, читатели."""
+    rnd = random.Random(random_seed)
+
+    def sample(values):
+        values = list(values)
+        return rnd.sample(values, min(len(values), SAMPLE_SIZE))
+
+    return {
+        'group_slugs': sample(Group.objects.values_list('slug', flat=True)),
+        'usernames': sample(User.objects.values_list('username', flat=True)),
+        'post_ids': sample(Post.objects.values_list('id', flat=True)),
+        'user_ids': sample(User.objects.values_list('id', flat=True)),
+    }
+
+
+def percentile(values, rank):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return None
+    position = max(math.ceil(rank / 100 * len(values)) - 1, 0)
+    return values[position]
+
+
+def _worker(name, requests, warmup, data, worker_seed, threaded):
+    request, needs_login = SCENARIOS[name]
+    rnd = random.Random(worker_seed)
+    client = Client()
+    if needs_login:
+        client.force_login(User.objects.get(pk=rnd.choice(data['user_ids'])))
+    latencies = []
+    queries = []
+    errors = 0
+    executed = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal executed
+        executed += 1
+        return execute(sql, params, many, context)
+
+    try:
+        for _ in range(warmup):
+            request(client, data, rnd)
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            for _ in range(requests):
+                executed = 0
+                start = time.perf_counter()
+                try:
+                    response = request(client, data, rnd)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                queries.append(executed)
+                errors += failed
+        finished = time.perf_counter()
+    finally:
+        if threaded:
+            connection.close()
+    return latencies, queries, errors, started, finished
+
+
+def run_scenario(name, requests, concurrency, data, warmup=0, random_seed=0):
+    """Прогоняет сценарий в concurrency потоках, у каждого свой клиент.
+
+    Время считается от первого замеренного запроса до последнего,
+    прогрев в него не входит. При concurrency=1 запросы идут
+    в текущем потоке и его соединении.
+    """
+    shares = [
+        requests // concurrency + (worker < requests % concurrency)
+        for worker in range(concurrency)
+    ]
+    jobs = [
+        (name, share, warmup, data, random_seed + worker, concurrency > 1)
+        for worker, share in enumerate(shares)
+    ]
+    if concurrency == 1:
+        results = [_worker(*jobs[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda job: _worker(*job), jobs))
+    elapsed = (
+        max(result[4] for result in results)
+        - min(result[3] for result in results)
+    )
+    latencies = sorted(
+        latency for result in results for latency in result[0]
+    )
+    queries = [count for result in results for count in result[1]]
+    errors = sum(result[2] for result in results)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            label: round(value * 1000, 2) if value is not None else None
+            for label, value in (
+                ('p50', percentile(latencies, 50)),
+                ('p95', percentile(latencies, 95)),
+                ('p99', percentile(latencies, 99)),
+                ('max', latencies[-1] if latencies else None),
+            )
+        },
+        'queries_per_request': (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
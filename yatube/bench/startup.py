@@ -0,0 +1,121 @@
+"""Время запуска и обработки запросов в профилях настроек dev и prod.
+
+Каждый замер идёт в отдельном процессе: загруженные модули и кэш
+шаблонов не переходят из одного профиля в другой.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ('dev', 'prod')
+METRICS = (
+    'process_ms', 'setup_ms', 'modules', 'first_request_ms', 'request_ms',
+)
+
+
+def measure(requests, urls):
+    """Замер внутри дочернего процесса, результат печатается в JSON."""
+    started = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    get_wsgi_application()
+    setup = time.perf_counter() - started
+    modules = len(sys.modules)
+    from django.test import Client
+    client = Client()
+    errors = 0
+
+    def get(url):
+        nonlocal errors
+        try:
+            errors += client.get(url).status_code >= 400
+        except Exception:
+            errors += 1
+
+    started = time.perf_counter()
+    for url in urls:
+        get(url)
+    first_request = (time.perf_counter() - started) / len(urls)
+    started = time.perf_counter()
+    for _ in range(requests):
+        for url in urls:
+            get(url)
+    request = (time.perf_counter() - started) / (requests * len(urls))
+    print(json.dumps({
+        'setup_ms': setup * 1000,
+        'modules': modules,
+        'first_request_ms': first_request * 1000,
+        'request_ms': request * 1000,
+        'errors': errors,
+    }))
+
+
+def _environ(profile, work_dir):
+    environ = dict(
+        os.environ,
+        DJANGO_ENV=profile,
+        DJANGO_SETTINGS_MODULE='yatube.settings',
+        DJANGO_STATIC_ROOT=os.path.join(work_dir, 'static'),
+        CACHE_LOCATION=os.path.join(work_dir, 'cache.sqlite3'),
+        METRICS_DIR=os.path.join(work_dir, 'metrics'),
+        QUERYLOG_FILE=os.path.join(work_dir, 'queries.log'),
+    )
+    environ.setdefault('DJANGO_SECRET_KEY', 'startup-bench')
+    return environ
+
+
+def run_profile(profile, base_dir, runs, requests, urls):
+    """Медианы замеров профиля по runs запускам процесса.
+
+    Для prod сначала собирается статика: хранилищу с манифестом
+    без неё нечего отдать шаблонам.
+    """
+    samples = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        environ = _environ(profile, work_dir)
+        if profile == 'prod':
+            subprocess.run(
+                [
+                    sys.executable, 'manage.py', 'collectstatic',
+                    '--noinput', '--verbosity', '0',
+                ],
+                cwd=base_dir, env=environ, check=True,
+            )
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [
+                    sys.executable, '-m', 'bench.startup',
+                    str(requests), *urls,
+                ],
+                cwd=base_dir, env=environ, check=True,
+                capture_output=True, text=True,
+            )
+            sample = json.loads(result.stdout.splitlines()[-1])
+            sample['process_ms'] = (time.perf_counter() - started) * 1000
+            samples.append(sample)
+    report = {
+        metric: round(statistics.median(
+            sample[metric] for sample in samples
+        ), 2)
+        for metric in METRICS
+    }
+    report['errors'] = sum(sample['errors'] for sample in samples)
+    return report
+
+
+def compare(profiles):
+    """Изменение каждой метрики prod относительно dev в процентах."""
+    dev, prod = profiles['dev'], profiles['prod']
+    return {
+        metric: round((prod[metric] - dev[metric]) / dev[metric] * 100, 1)
+        for metric in METRICS
+        if dev[metric]
+    }
+
+
+if __name__ == '__main__':
+    measure(int(sys.argv[1]), sys.argv[2:])
@@ -0,0 +1,314 @@
+"""Синтетическая соцсеть для оценки ёмкости.
+
+Популярность авторов убывает по закону Ципфа: от ранга зависят и
+число подписчиков, и частота постов, и всплески комментариев под
+постами. Строки вставляются bulk_create пачками в нескольких
+процессах. id пользователей и постов назначаются заранее, поэтому
+процессам не нужно читать друг у друга, кто что вставил.
+"""
+import datetime
+import itertools
+import math
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from posts import timeline
+from posts.cache import bump_feed_generation
+from posts.counters import recount_all
+from posts.models import Comment, Follow, Group, Post, Profile, User
+from posts.transfer import keep_timestamps
+
+SENTENCES = 2000
+GROUP_SHARE = 0.6
+COMMENT_BURST_MINUTES = 30
+RECOUNT_BATCH_SIZE = 1000
+# SQLite does not queue writers fairly: a worker may wait for the lock
+# while the others commit batch after batch.
+WORKER_BUSY_TIMEOUT_MS = 120000
+
+
+@lru_cache(maxsize=None)
+def _faker(locale, seed):
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+    return fake
+
+
+@lru_cache(maxsize=None)
+def _sentences(locale, seed):
+    fake = _faker(locale, seed)
+    return [fake.sentence(nb_words=10) for _ in range(SENTENCES)]
+
+
+@lru_cache(maxsize=None)
+def _zipf(size, exponent):
+    """Накопленные веса рангов 0..size-1 для random.choices."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)
+    ))
+
+
+def _step(size):
+    """Шаг, перемешивающий ранги: rank * step % size — перестановка."""
+    step = max(int(size * 0.618), 1)
+    while math.gcd(step, size) != 1:
+        step += 1
+    return step
+
+
+def _user_id(plan, rank):
+    return plan['user_base'] + rank * plan['step'] % plan['users']
+
+
+def _text(rnd, plan, amount):
+    sentences = _sentences(plan['locale'], plan['seed'])
+    return ' '.join(rnd.sample(sentences, amount))
+
+
+def _date(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def _save(model, objects, plan, **kwargs):
+    """Каждая пачка — своя транзакция: SQLite пускает одного писателя,
+    и короткие транзакции не держат остальные процессы дольше
+    busy_timeout."""
+    batch = plan['batch_size']
+    for start in range(0, len(objects), batch):
+        model.objects.bulk_create(objects[start:start + batch], **kwargs)
+
+
+def insert_users(start, stop, plan):
+    fake = _faker(plan['locale'], plan['seed'] + start)
+    password = make_password(None)
+    ids = range(plan['user_base'] + start, plan['user_base'] + stop)
+    _save(User, [
+        User(
+            id=user_id,
+            username=f'{fake.user_name()}_{user_id}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password=password,
+        )
+        for user_id in ids
+    ], plan)
+    _save(Profile, [Profile(user_id=user_id) for user_id in ids], plan)
+    return stop - start
+
+
+def insert_follows(start, stop, plan):
+    """Подписчик выбирает авторов с весом по рангу популярности,
+    поэтому число подписчиков распределено по степенному закону."""
+    rnd = random.Random(plan['seed'] + start)
+    weights = _zipf(plan['users'], plan['follower_exponent'])
+    ranks = range(plan['users'])
+    follows = []
+    for index in range(start, stop):
+        user_id = plan['user_base'] + index
+        amount = min(
+            int(rnd.expovariate(1 / plan['follows_per_user'])),
+            plan['users'] - 1,
+        )
+        authors = {
+            _user_id(plan, rank)
+            for rank in rnd.choices(ranks, cum_weights=weights, k=amount)
+        }
+        authors.discard(user_id)
+        follows.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in authors
+        )
+    _save(Follow, follows, plan, ignore_conflicts=True)
+    return stop - start
+
+
+def insert_posts(start, stop, plan):
+    """Посты с комментариями для диапазона номеров постов.
+
+    Автор поста выбирается по закону Ципфа, даты растут вместе с id.
+    Под постом популярного автора в среднем больше комментариев, они
+    приходят всплеском в первые минуты после публикации.
+    """
+    rnd = random.Random(plan['seed'] + start)
+    post_weights = _zipf(plan['users'], plan['post_exponent'])
+    group_weights = _zipf(len(plan['group_ids']), 1.0)
+    ranks = range(plan['users'])
+    now = timezone.now()
+    posts = []
+    comments = []
+    for index in range(start, stop):
+        rank, = rnd.choices(ranks, cum_weights=post_weights)
+        pub_date = _date(
+            plan['started'] + plan['span'] * (index + rnd.random())
+            / plan['posts']
+        )
+        group_id = None
+        if plan['group_ids'] and rnd.random() < GROUP_SHARE:
+            group_id, = rnd.choices(
+                plan['group_ids'], cum_weights=group_weights
+            )
+        post_id = plan['post_base'] + index
+        posts.append(Post(
+            id=post_id,
+            author_id=_user_id(plan, rank),
+            group_id=group_id,
+            text=_text(rnd, plan, rnd.randint(1, 5)),
+            pub_date=pub_date,
+            updated=pub_date,
+        ))
+        expected = (
+            plan['comment_scale'] / (rank + 1) ** plan['follower_exponent']
+        )
+        for _ in range(int(rnd.expovariate(1) * expected + rnd.random())):
+            created = pub_date + datetime.timedelta(
+                minutes=rnd.expovariate(1 / COMMENT_BURST_MINUTES)
+            )
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=plan['user_base'] + rnd.randrange(plan['users']),
+                text=_text(rnd, plan, rnd.randint(1, 2)),
+                created=min(created, now),
+            ))
+    with keep_timestamps():
+        _save(Post, posts, plan)
+        _save(Comment, comments, plan)
+    return stop - start
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def _comment_scale(users, posts, comments, post_exponent, follower_exponent):
+    """Множитель, при котором комментариев в среднем ровно comments."""
+    post_weights = [1 / (rank + 1) ** post_exponent for rank in range(users)]
+    popularity = sum(
+        weight / (rank + 1) ** follower_exponent
+        for rank, weight in enumerate(post_weights)
+    ) / sum(post_weights)
+    return comments / (posts * popularity) if posts else 0
+
+
+def _create_groups(amount, plan):
+    fake = _faker(plan['locale'], plan['seed'])
+    base = _next_id(Group)
+    Group.objects.bulk_create(
+        Group(
+            id=group_id,
+            title=f'{fake.word().capitalize()} {group_id}',
+            slug=f'seed-{group_id}',
+            description=fake.paragraph(),
+        )
+        for group_id in range(base, base + amount)
+    )
+    return list(range(base, base + amount))
+
+
+def _start_worker():
+    django.setup()
+    settings.SQLITE_PRAGMAS = dict(
+        settings.SQLITE_PRAGMAS, busy_timeout=WORKER_BUSY_TIMEOUT_MS
+    )
+
+
+def _run(function, total, plan, pool, progress, name):
+    chunk = plan['chunk_size']
+    ranges = [
+        (start, min(start + chunk, total))
+        for start in range(0, total, chunk)
+    ]
+    done = 0
+    if pool is None:
+        results = (function(start, stop, plan) for start, stop in ranges)
+    else:
+        results = (
+            future.result() for future in as_completed([
+                pool.submit(function, start, stop, plan)
+                for start, stop in ranges
+            ])
+        )
+    for rows in results:
+        done += rows
+        if progress:
+            progress(name, done, total)
+
+
+def generate(users, groups, posts, comments, follows_per_user,
+             follower_exponent=1.1, post_exponent=1.0, days=365,
+             processes=1, chunk_size=5000, batch_size=500, random_seed=0,
+             locale='ru_RU', timelines=True, progress=None):
+    """Добавляет в базу синтетических пользователей, группы, подписки,
+    посты и комментарии, затем пересчитывает счётчики и ленты.
+
+    При processes > 1 пачки вставляют дочерние процессы, каждый со
+    своим соединением; база в памяти тестов им не видна.
+    """
+    now = timezone.now().timestamp()
+    plan = {
+        'users': users,
+        'posts': posts,
+        'follows_per_user': follows_per_user,
+        'follower_exponent': follower_exponent,
+        'post_exponent': post_exponent,
+        'user_base': _next_id(User),
+        'post_base': _next_id(Post),
+        'step': _step(users) if users else 1,
+        'started': now - days * 24 * 60 * 60,
+        'span': days * 24 * 60 * 60,
+        'comment_scale': _comment_scale(
+            users, posts, comments, post_exponent, follower_exponent
+        ),
+        'chunk_size': chunk_size,
+        'batch_size': batch_size,
+        'seed': random_seed,
+        'locale': locale,
+    }
+    plan['group_ids'] = _create_groups(groups, plan)
+    pool = None
+    if processes > 1:
+        # Children must open their own database connections.
+        connections.close_all()
+        methods = multiprocessing.get_all_start_methods()
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context(
+                'fork' if 'fork' in methods else 'spawn'
+            ),
+            initializer=_start_worker,
+        )
+    try:
+        _run(insert_users, users, plan, pool, progress, 'users')
+        if users > 1:
+            _run(insert_follows, users, plan, pool, progress, 'follows')
+        if users:
+            _run(insert_posts, posts, plan, pool, progress, 'posts')
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    recount_all(RECOUNT_BATCH_SIZE)
+    if timelines:
+        cache.delete(timeline.HOT_AUTHORS_KEY)
+        timeline.rebuild()
+    bump_feed_generation()
+    return {
+        'users': User.objects.filter(id__gte=plan['user_base']).count(),
+        'groups': len(plan['group_ids']),
+        'posts': Post.objects.filter(id__gte=plan['post_base']).count(),
+        'comments': Comment.objects.filter(
+            post_id__gte=plan['post_base']
+        ).count(),
+        'follows': Follow.objects.filter(
+            user_id__gte=plan['user_base']
+        ).count(),
+    }
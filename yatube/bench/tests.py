@@ -0,0 +1,141 @@
+import importlib
+import os
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from bench.cache import private_cache
+from bench.factory import seed
+from bench.runner import SCENARIOS, percentile, run_scenario, sample_data
+from bench.startup import METRICS, compare, run_profile
+from bench.synthetic import generate
+from posts.cache import feed_generation, object_versions
+from posts.models import Follow, Post, Profile, TimelineEntry
+
+
+class BenchTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_seed_creates_requested_volumes(self):
+        """Фабрика создаёт данные и собирает ленты и счётчики"""
+        seeded = seed(
+            users=20, groups=3, posts=600, comments=50, follows=30
+        )
+        self.assertEqual(seeded['users'], 20)
+        self.assertEqual(seeded['groups'], 3)
+        self.assertEqual(seeded['posts'], 600)
+        self.assertEqual(seeded['comments'], 50)
+        self.assertTrue(TimelineEntry.objects.exists())
+        post = Post.objects.select_related('author__profile').first()
+        self.assertEqual(
+            post.author.profile.posts_count,
+            Post.objects.filter(author=post.author).count(),
+        )
+
+    def test_synthetic_graph_is_skewed(self):
+        """Синтетическая соцсеть: подписчиков и постов у популярных
+        авторов намного больше, чем у остальных"""
+        created = generate(
+            users=60, groups=3, posts=400, comments=300,
+            follows_per_user=8, chunk_size=25, batch_size=10,
+        )
+        self.assertEqual(created['users'], 60)
+        self.assertEqual(created['groups'], 3)
+        self.assertEqual(created['posts'], 400)
+        self.assertEqual(created['follows'], Follow.objects.count())
+        self.assertGreater(created['comments'], 0)
+        followers = sorted(
+            Profile.objects.values_list('followers_count', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 4 * followers[len(followers) // 2])
+        authors = sorted(
+            Profile.objects.values_list('posts_count', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(authors[0], 4 * authors[len(authors) // 2])
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_seed_invalidates_shared_cache(self):
+        """seed пишет в настоящую базу, поэтому сбрасывает поколение
+        ленты и версии страниц в общем кэше"""
+        generation = feed_generation()
+        versions = object_versions()
+        call_command(
+            'seed', '--users', '20', '--groups', '2', '--posts', '50',
+            '--comments', '20', '--processes', '1', verbosity=0,
+            stdout=StringIO(),
+        )
+        self.assertNotEqual(feed_generation(), generation)
+        self.assertNotEqual(object_versions(), versions)
+
+    def test_every_scenario_runs_without_errors(self):
+        """Каждый сценарий отдаёт отчёт с задержками и числом запросов"""
+        seed(users=10, groups=2, posts=30, comments=20, follows=15)
+        data = sample_data()
+        for name in SCENARIOS:
+            with self.subTest(scenario=name):
+                report = run_scenario(name, 5, 1, data, warmup=1)
+                self.assertEqual(report['requests'], 5)
+                self.assertEqual(report['errors'], 0)
+                self.assertIsNotNone(report['queries_per_request'])
+                self.assertLessEqual(
+                    report['latency_ms']['p50'], report['latency_ms']['p99']
+                )
+
+    def test_private_cache_leaves_shared_cache_alone(self):
+        """Замеры и заполнение базы работают со своим кэшем и не видят
+        и не меняют общий"""
+        cache.set('marker', 'сервер')
+        shared = caches['shared']
+        with private_cache():
+            self.assertIsNot(caches['shared'], shared)
+            self.assertIsNone(cache.get('marker'))
+            cache.set('marker', 'замер')
+            cache.clear()
+        self.assertEqual(cache.get('marker'), 'сервер')
+        self.assertEqual(shared.get('marker'), 'сервер')
+
+    def test_percentile_nearest_rank(self):
+        """Перцентиль считается по ближайшему рангу"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class StartupTests(SimpleTestCase):
+    def test_prod_profile(self):
+        """Профиль prod кэширует шаблоны, держит соединение с базой
+        и обходится без debug_toolbar"""
+        with mock.patch.dict(os.environ, DJANGO_SECRET_KEY='test'):
+            prod = importlib.import_module('yatube.settings.prod')
+        self.assertFalse(prod.DEBUG)
+        self.assertNotIn('debug_toolbar', prod.INSTALLED_APPS)
+        self.assertFalse(any(
+            'debug_toolbar' in middleware for middleware in prod.MIDDLEWARE
+        ))
+        loader, _ = prod.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertGreater(prod.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertTrue(
+            prod.STATICFILES_STORAGE.endswith('ManifestStaticFilesStorage')
+        )
+
+    def test_startup_profile_report(self):
+        """Замер профиля в отдельном процессе отдаёт все метрики"""
+        report = run_profile('dev', settings.BASE_DIR, 1, 1, ['/about/tech/'])
+        self.assertEqual(report['errors'], 0)
+        for metric in METRICS:
+            self.assertGreater(report[metric], 0)
+        other = dict(report, request_ms=report['request_ms'] / 2)
+        self.assertEqual(
+            compare({'dev': report, 'prod': other})['request_ms'], -50
+        )
@@ -0,0 +1,306 @@
+"""Кэш, общий для всех процессов одного хоста.
+
+Записи лежат в файле SQLite в /dev/shm, то есть в разделяемой памяти:
+каждый воркер открывает его своим соединением и читает страницы через
+mmap, внешний сервис не нужен. Целые числа хранятся как есть, поэтому
+incr — один атомарный UPDATE; остальное пиклится, крупные значения
+дополнительно сжимаются zlib.
+
+Объём записей (ключи и значения) ограничен MAX_BYTES. Его держат
+триггеры в отдельной строке, и когда запись выходит за бюджет, кэш
+удаляет просроченные записи, а за ними давно не читанные, пока
+не освободит долю бюджета 1 / CULL_FREQUENCY. MAX_ENTRIES не
+используется. Время последнего чтения обновляется не чаще раза
+в ACCESS_RESOLUTION секунд, чтобы чтение горячих ключей не вставало
+в очередь к писателям.
+"""
+import atexit
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+COMPRESS_MIN_BYTES = 1024
+ACCESS_RESOLUTION = 5
+BUSY_TIMEOUT = 30
+# SQLite limits the number of parameters in one statement.
+CHUNK_SIZE = 500
+SHM_DIR = '/dev/shm'
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB,
+        compressed INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    """
+    CREATE TABLE IF NOT EXISTS cache_size (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        bytes INTEGER NOT NULL
+    )
+    """,
+    'INSERT OR IGNORE INTO cache_size VALUES (0, 0)',
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+        UPDATE cache_size SET bytes = bytes + NEW.size;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache
+    BEGIN
+        UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+        UPDATE cache_size SET bytes = bytes - OLD.size;
+    END
+    """,
+)
+UPSERT = """
+    INSERT INTO cache (key, value, compressed, size, expires, accessed)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (key) DO UPDATE SET
+        value = excluded.value, compressed = excluded.compressed,
+        size = excluded.size, expires = excluded.expires,
+        accessed = excluded.accessed
+"""
+# add() only replaces an expired entry.
+ADD = UPSERT + ' WHERE cache.expires <= excluded.accessed'
+CULL = """
+    DELETE FROM cache WHERE key IN (
+        SELECT key FROM (
+            SELECT key, size,
+                SUM(size) OVER (ORDER BY accessed, key) AS running
+            FROM cache
+        ) WHERE running - size < ?
+    )
+"""
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+def default_location():
+    directory = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+    return os.path.join(directory, 'yatube-cache.sqlite3')
+
+
+def _remove_files(path):
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location or default_location()
+        self._max_bytes = int(options.get('MAX_BYTES', DEFAULT_MAX_BYTES))
+        self._compress_min = int(
+            options.get('COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES)
+        )
+        if options.get('TEMPORARY'):
+            # Only the process that created the file removes it; forked
+            # workers leave through os._exit and skip atexit.
+            atexit.register(_remove_files, self._path)
+        self._connection = None
+        self._pid = None
+
+    def _db(self):
+        """Соединение этого процесса: после fork открывается новое."""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = self._connect()
+            self._pid = os.getpid()
+        return self._connection
+
+    def _connect(self):
+        db = sqlite3.connect(
+            self._path, timeout=BUSY_TIMEOUT, isolation_level=None
+        )
+        db.execute('PRAGMA journal_mode = wal')
+        # The cache is disposable and lives in memory anyway.
+        db.execute('PRAGMA synchronous = off')
+        db.execute(f'PRAGMA mmap_size = {2 * self._max_bytes}')
+        with self._transaction(db):
+            for statement in SCHEMA:
+                db.execute(statement)
+        return db
+
+    @contextmanager
+    def _transaction(self, db=None):
+        db = db or self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _encode(self, value):
+        """Значение для столбца value, флаг сжатия и размер."""
+        if type(value) is int and value in INTEGER_RANGE:
+            return value, 0, 8
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self._compress_min:
+            packed = zlib.compress(data, 1)
+            if len(packed) < len(data):
+                return packed, 1, len(packed)
+        return data, 0, len(data)
+
+    @staticmethod
+    def _decode(value, compressed):
+        if isinstance(value, int):
+            return value
+        if compressed:
+            value = zlib.decompress(value)
+        return pickle.loads(value)
+
+    def _row(self, key, value, timeout, now):
+        stored, compressed, size = self._encode(value)
+        return (
+            key, stored, compressed, size + len(key),
+            self.get_backend_timeout(timeout), now,
+        )
+
+    def _cull(self, db):
+        total, = db.execute('SELECT bytes FROM cache_size').fetchone()
+        if total <= self._max_bytes:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        total, = db.execute('SELECT bytes FROM cache_size').fetchone()
+        target = 0
+        if self._cull_frequency:
+            target = self._max_bytes - self._max_bytes // self._cull_frequency
+        if total > target:
+            db.execute(CULL, (total - target,))
+
+    def _touch_accessed(self, keys, now):
+        """Отмечает чтение ключей, если с прошлой отметки прошло время."""
+        if not keys:
+            return
+        with self._transaction() as db:
+            db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, key) for key in keys],
+            )
+
+    def _select(self, keys, now):
+        """Живые записи по ключам: {ключ: значение}."""
+        found, stale = {}, []
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self._db().execute(
+                'SELECT key, value, compressed, accessed FROM cache '
+                f'WHERE key IN ({placeholders}) AND {ALIVE}',
+                (*chunk, now),
+            )
+            for key, value, compressed, accessed in rows:
+                found[key] = self._decode(value, compressed)
+                if now - accessed > ACCESS_RESOLUTION:
+                    stale.append(key)
+        self._touch_accessed(stale, now)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._select([key], time.time()).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        found = self._select(list(keys), time.time())
+        return {keys[key]: value for key, value in found.items()}
+
+    def has_key(self, key, version=None):
+        row = self._db().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return row is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self._row(self._key(key, version), value, timeout, time.time())
+        with self._transaction() as db:
+            db.execute(UPSERT, row)
+            self._cull(db)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [
+            self._row(self._key(key, version), value, timeout, now)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            db.executemany(UPSERT, rows)
+            self._cull(db)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self._row(self._key(key, version), value, timeout, time.time())
+        with self._transaction() as db:
+            added = db.execute(ADD, row).rowcount == 1
+            if added:
+                self._cull(db)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        cursor = self._db().execute(
+            f'UPDATE cache SET expires = ?, accessed = ? '
+            f'WHERE key = ? AND {ALIVE}',
+            (
+                self.get_backend_timeout(timeout), now,
+                self._key(key, version), now,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        # fetchall() steps the statement to the end, which commits it.
+        row = self._db().execute(
+            'UPDATE cache SET value = value + ?, accessed = ? '
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {ALIVE} "
+            'RETURNING value',
+            (delta, now, key, now),
+        ).fetchall()
+        if not row:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0][0]
+
+    def delete(self, key, version=None):
+        cursor = self._db().execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._transaction() as db:
+            db.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        self._db().execute('DELETE FROM cache')
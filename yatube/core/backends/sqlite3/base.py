@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite, в котором транзакции сразу берут блокировку записи.
+
+    Отложенная транзакция читает под разделяемой блокировкой и при
+    первой записи пытается её повысить. Если то же делает соседний
+    процесс, одна из транзакций получает «database is locked» без
+    ожидания: busy_timeout тут не помогает. BEGIN IMMEDIATE ставит
+    писателей в очередь ещё до первого чтения.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        mode = settings.SQLITE_TRANSACTION_MODE
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,293 @@
+"""Двухуровневый кэш: память процесса (L1) перед общим кэшем (L2).
+
+L1 — ограниченный MAX_ENTRIES LRU в памяти процесса. Строки и числа
+хранятся в нём как есть, остальное пиклится, чтобы вызывающий код
+не испортил чужую копию. L2 — кэш из CACHES с именем LOCATION.
+
+Согласованность держит журнал изменений в L2: каждая запись через
+этот кэш увеличивает счётчик журнала и кладёт под его номером список
+изменённых ключей. В начале каждого запроса (и не реже раза
+в SYNC_INTERVAL секунд вне запросов) процесс читает счётчик и выбрасывает
+из L1 ключи из новых записей журнала; если записи уже вытеснены или
+их слишком много, L1 очищается целиком. Записи, истёкшие в L2
+по таймауту, в журнал не попадают, поэтому L1 хранит ключ не дольше
+L1_TIMEOUT секунд.
+
+Попадания и промахи каждого уровня идут в метрики как кэши l1 и l2.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core import signals
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.metrics import record_cache
+
+L1_TIMEOUT = 30
+SYNC_INTERVAL = 1
+LOG_SEQUENCE_KEY = 'l1:log'
+LOG_ENTRY_KEY = 'l1:log:{}'
+# Workers that fell further behind clear their L1 instead of replaying.
+LOG_SIZE = 1000
+LOG_TIMEOUT = 5 * 60
+IMMUTABLE = (str, bytes, int, float, type(None))
+MISSING = object()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """L1 одного процесса и номер последней прочитанной записи журнала."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.sequence = None
+        self.synced = None
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, pickled, value = entry
+            if expires <= now:
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(value) if pickled else value
+
+    def put(self, items, expires, max_entries, sequence=MISSING):
+        """Кладёт значения; с sequence — только если журнал с тех пор
+        не читали, иначе значение из L2 могло уже устареть."""
+        items = [
+            (key, (expires, False, value)) if isinstance(value, IMMUTABLE)
+            else (key, (expires, True, pickle.dumps(
+                value, pickle.HIGHEST_PROTOCOL
+            )))
+            for key, value in items
+        ]
+        with self.lock:
+            if sequence is not MISSING and sequence != self.sequence:
+                return
+            for key, entry in items:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+
+def _sync_on_request(**kwargs):
+    for store in _stores.values():
+        store.synced = None
+
+
+signals.request_started.connect(_sync_on_request)
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = location
+        self._l1_timeout = float(options.get('L1_TIMEOUT', L1_TIMEOUT))
+        self._sync_interval = float(
+            options.get('SYNC_INTERVAL', SYNC_INTERVAL)
+        )
+        with _stores_lock:
+            self._store = _stores.setdefault(location, LocalStore())
+
+    @property
+    def _l2(self):
+        return caches[self._l2_alias]
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout, now):
+        expires = now + self._l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            expires = min(expires, now + timeout)
+        return expires
+
+    def _sync(self):
+        """Выбрасывает из L1 ключи, изменённые другими процессами."""
+        store = self._store
+        started = time.monotonic()
+        if (
+            store.synced is not None
+            and started - store.synced < self._sync_interval
+        ):
+            return
+        store.synced = started
+        sequence = self._l2.get(LOG_SEQUENCE_KEY)
+        if sequence is None:
+            self._l2.add(LOG_SEQUENCE_KEY, int(time.time() * 1000), None)
+            sequence = self._l2.get(LOG_SEQUENCE_KEY)
+        last = store.sequence
+        if sequence == last:
+            return
+        changed = None
+        if last is not None and 0 < sequence - last <= LOG_SIZE:
+            entries = self._l2.get_many([
+                LOG_ENTRY_KEY.format(number)
+                for number in range(last + 1, sequence + 1)
+            ])
+            if len(entries) == sequence - last:
+                changed = [key for keys in entries.values() for key in keys]
+        with store.lock:
+            store.sequence = sequence
+            if changed is None:
+                store.entries.clear()
+            else:
+                for key in changed:
+                    store.entries.pop(key, None)
+
+    def _log(self, keys):
+        """Записывает изменённые ключи в журнал для других процессов."""
+        l2 = self._l2
+        try:
+            sequence = l2.incr(LOG_SEQUENCE_KEY)
+        except ValueError:
+            l2.add(LOG_SEQUENCE_KEY, int(time.time() * 1000), None)
+            sequence = l2.incr(LOG_SEQUENCE_KEY)
+        l2.set(LOG_ENTRY_KEY.format(sequence), keys, LOG_TIMEOUT)
+        store = self._store
+        with store.lock:
+            # Our own change needs no replay if nobody wrote in between.
+            if store.sequence == sequence - 1:
+                store.sequence = sequence
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        full_key = self._key(key, version)
+        now = time.time()
+        value = self._store.get(full_key, now)
+        if value is not MISSING:
+            record_cache('l1', hits=1)
+            return value
+        record_cache('l1', misses=1)
+        sequence = self._store.sequence
+        value = self._l2.get(key, MISSING, version=version)
+        if value is MISSING:
+            record_cache('l2', misses=1)
+            return default
+        record_cache('l2', hits=1)
+        self._store.put(
+            [(full_key, value)], now + self._l1_timeout,
+            self._max_entries, sequence,
+        )
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        now = time.time()
+        found, missing = {}, {}
+        for key in keys:
+            full_key = self._key(key, version)
+            value = self._store.get(full_key, now)
+            if value is MISSING:
+                missing[key] = full_key
+            else:
+                found[key] = value
+        record_cache('l1', hits=len(found), misses=len(missing))
+        if not missing:
+            return found
+        sequence = self._store.sequence
+        fetched = self._l2.get_many(list(missing), version=version)
+        record_cache(
+            'l2', hits=len(fetched), misses=len(missing) - len(fetched)
+        )
+        self._store.put(
+            [(missing[key], value) for key, value in fetched.items()],
+            now + self._l1_timeout, self._max_entries, sequence,
+        )
+        found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        self._sync()
+        value = self._store.get(self._key(key, version), time.time())
+        return value is not MISSING or self._l2.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self._key(key, version)
+        self._l2.set(key, value, timeout, version=version)
+        self._log([full_key])
+        self._store.put(
+            [(full_key, value)], self._expires(timeout, time.time()),
+            self._max_entries,
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._l2.set_many(data, timeout, version=version)
+        stored = [
+            (self._key(key, version), value)
+            for key, value in data.items() if key not in failed
+        ]
+        self._log([key for key, _ in stored])
+        self._store.put(
+            stored, self._expires(timeout, time.time()), self._max_entries
+        )
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._l2.add(key, value, timeout, version=version)
+        if added:
+            full_key = self._key(key, version)
+            self._log([full_key])
+            self._store.put(
+                [(full_key, value)], self._expires(timeout, time.time()),
+                self._max_entries,
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self._key(key, version)
+        try:
+            value = self._l2.incr(key, delta, version=version)
+        except ValueError:
+            self._store.discard([full_key])
+            raise
+        self._log([full_key])
+        self._store.put(
+            [(full_key, value)], time.time() + self._l1_timeout,
+            self._max_entries,
+        )
+        return value
+
+    def delete(self, key, version=None):
+        full_key = self._key(key, version)
+        self._store.discard([full_key])
+        deleted = self._l2.delete(key, version=version)
+        self._log([full_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        full_keys = [self._key(key, version) for key in keys]
+        self._store.discard(full_keys)
+        self._l2.delete_many(keys, version=version)
+        self._log(full_keys)
+
+    def clear(self):
+        """Очистка L2 стирает и журнал: другие процессы, не найдя
+        своего номера, очистят L1 при следующей сверке."""
+        self._l2.clear()
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.sequence = None
+            self._store.synced = None
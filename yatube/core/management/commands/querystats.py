@@ -0,0 +1,86 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    'events': lambda stats: stats['events'],
+    'queries': lambda stats: stats['queries'],
+    'time': lambda stats: stats['ms'],
+}
+
+
+def summarize(lines, kind=None):
+    """Складывает записи журнала по виду и форме запроса."""
+    summary = defaultdict(lambda: {
+        'events': 0, 'queries': 0, 'ms': 0.0, 'max_ms': 0.0,
+        'views': Counter(), 'origins': Counter(),
+    })
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if kind and record['kind'] != kind:
+            continue
+        stats = summary[(record['kind'], record['sql'])]
+        stats['events'] += 1
+        stats['queries'] += record['count']
+        stats['ms'] += record['ms']
+        stats['max_ms'] = max(stats['max_ms'], record['ms'])
+        stats['views'][record['view']] += 1
+        where = ' '.join(
+            part for part in (record.get('template'), record.get('code'))
+            if part
+        )
+        stats['origins'][where or '?'] += 1
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных и повторяющихся запросов к базе '
+        '(QUERYLOG_FILE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*')
+        parser.add_argument('--kind', choices=('slow', 'repeated'))
+        parser.add_argument(
+            '--sort', choices=list(SORT_KEYS), default='time'
+        )
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        lines = []
+        for path in options['files'] or [settings.QUERYLOG_FILE]:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    lines.extend(file)
+            except OSError as exc:
+                raise CommandError(f'Не удалось прочитать {path}: {exc}')
+        summary = summarize(lines, options['kind'])
+        if not summary:
+            self.stdout.write('Журнал запросов пуст.')
+            return
+        rows = sorted(
+            summary.items(),
+            key=lambda item: SORT_KEYS[options['sort']](item[1]),
+            reverse=True,
+        )
+        for (kind, sql), stats in rows[:options['limit']]:
+            views = ', '.join(
+                f'{view} ×{count}'
+                for view, count in stats['views'].most_common(3)
+            )
+            where, _ = stats['origins'].most_common(1)[0]
+            self.stdout.write(
+                f"{kind}: событий {stats['events']}, "
+                f"запросов {stats['queries']}, "
+                f"всего {stats['ms']:.1f} мс, "
+                f"максимум {stats['max_ms']:.1f} мс"
+            )
+            self.stdout.write(f'  вью: {views}')
+            self.stdout.write(f'  откуда: {where}')
+            self.stdout.write(f'  {sql}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.replicas import refresh_replicas
+from posts.cache import ALL_VERSIONS, bump_feed_generation, bump_versions
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в локальные реплики '
+        '(DATABASE_REPLICAS) — замена настоящей репликации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд, пока команду не остановят.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = refresh_replicas()
+            # Pages rendered from a stale replica were cached under the
+            # current generation and ETags; with a shared cache this drops
+            # them and clients revalidating with an old ETag get a 200.
+            bump_feed_generation()
+            bump_versions(ALL_VERSIONS)
+            if options['verbosity'] > 1 or not options['interval']:
+                self.stdout.write(
+                    'Реплики обновлены: ' + (', '.join(refreshed) or 'нет')
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
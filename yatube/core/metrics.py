@@ -0,0 +1,261 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Wall time of a request by view.', TIME_BUCKETS,
+    ),
+    'yatube_db_duration_seconds': (
+        'Time spent in database queries per request by view.', TIME_BUCKETS,
+    ),
+    'yatube_db_queries': (
+        'Database queries per request by view.', QUERY_BUCKETS,
+    ),
+    'yatube_template_duration_seconds': (
+        'Template render time per request by view.', TIME_BUCKETS,
+    ),
+}
+COUNTERS = {
+    'yatube_responses_total': 'Responses by view and status code.',
+    'yatube_cache_requests_total': 'Cache lookups by view, cache and result.',
+}
+
+_local = threading.local()
+
+
+class Registry:
+    """Гистограммы и счётчики процесса.
+
+    Раз в METRICS_FLUSH_INTERVAL секунд процесс сбрасывает их в свой
+    файл в METRICS_DIR, страница /metrics/ складывает файлы всех
+    процессов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = defaultdict(float)
+        self._flushed = 0.0
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [
+                    [0] * (len(buckets) + 1), 0.0, 0,
+                ]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'histograms': [
+                    [name, dict(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count)
+                    in self._histograms.items()
+                ],
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def _path(self):
+        return os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+
+    def flush(self):
+        if not settings.METRICS_DIR:
+            return
+        self._flushed = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=settings.METRICS_DIR, suffix='.tmp'
+        )
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temp_path, self._path())
+
+    def flush_if_due(self):
+        due = self._flushed + settings.METRICS_FLUSH_INTERVAL
+        if settings.METRICS_DIR and time.monotonic() >= due:
+            self.flush()
+
+    def collect(self):
+        """Снимки всех процессов: свой текущий и файлы остальных."""
+        snapshots = [self.snapshot()]
+        if settings.METRICS_DIR:
+            own_path = self._path()
+            pattern = os.path.join(settings.METRICS_DIR, '*.json')
+            for path in glob.glob(pattern):
+                if path == own_path:
+                    continue
+                try:
+                    with open(path) as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+        return snapshots
+
+
+registry = Registry()
+
+
+class RequestSample:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache = defaultdict(int)
+
+    def time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def start_request():
+    _local.sample = RequestSample()
+    return _local.sample
+
+
+def finish_request(sample, view, status):
+    _local.sample = None
+    labels = {'view': view}
+    registry.observe(
+        'yatube_request_duration_seconds', labels,
+        time.perf_counter() - sample.started,
+    )
+    registry.observe('yatube_db_duration_seconds', labels, sample.db_time)
+    registry.observe('yatube_db_queries', labels, sample.queries)
+    registry.observe(
+        'yatube_template_duration_seconds', labels, sample.template_time
+    )
+    registry.increment(
+        'yatube_responses_total', {'view': view, 'status': str(status)}
+    )
+    for (name, result), count in sample.cache.items():
+        registry.increment(
+            'yatube_cache_requests_total',
+            {'view': view, 'cache': name, 'result': result},
+            count,
+        )
+    registry.flush_if_due()
+
+
+@contextmanager
+def template_timer():
+    """Время отрисовки шаблона; вложенные шаблоны не считаются дважды."""
+    sample = getattr(_local, 'sample', None)
+    if sample is None:
+        yield
+        return
+    sample.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.template_depth -= 1
+        if not sample.template_depth:
+            sample.template_time += time.perf_counter() - started
+
+
+def record_cache(name, hits=0, misses=0):
+    sample = getattr(_local, 'sample', None)
+    if sample is not None:
+        sample.cache[(name, 'hit')] += hits
+        sample.cache[(name, 'miss')] += misses
+
+
+def _merge(snapshots):
+    histograms = {}
+    counters = defaultdict(float)
+    for snapshot in snapshots:
+        for name, labels, counts, total, count in snapshot['histograms']:
+            if name not in HISTOGRAMS:
+                continue
+            key = (name, tuple(sorted(labels.items())))
+            merged = histograms.setdefault(
+                key, [[0] * len(counts), 0.0, 0]
+            )
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(sorted(labels.items())))] += value
+    return histograms, counters
+
+
+def _labels(labels):
+    return ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for name, value in labels
+    )
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(snapshots):
+    histograms, counters = _merge(snapshots)
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, labels), (counts, total, count) in sorted(
+            histograms.items()
+        ):
+            if metric != name:
+                continue
+            cumulative = 0
+            bounds = [_number(bound) for bound in buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = _labels(labels + (('le', bound),))
+                lines.append(f'{name}_bucket{{{bucket_labels}}} {cumulative}')
+            lines.append(f'{name}_sum{{{_labels(labels)}}} {_number(total)}')
+            lines.append(f'{name}_count{{{_labels(labels)}}} {count}')
+    for name, help_text in COUNTERS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{{{_labels(labels)}}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
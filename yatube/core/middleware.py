@@ -0,0 +1,77 @@
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics, routers
+from core.querylog import QueryLog
+
+
+class MetricsMiddleware:
+    """Собирает по имени вью время ответа, запросы к базе, время
+    отрисовки шаблонов и обращения к кэшу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = metrics.start_request()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(sample.time_query)
+                    )
+                response = self.get_response(request)
+            status = response.status_code
+        finally:
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else '<unresolved>'
+            metrics.finish_request(sample, view, status)
+        return response
+
+
+class QueryLogMiddleware:
+    """Пишет в журнал yatube.queries медленные запросы к базе
+    и запросы, повторённые в одном ответе (N+1)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.QUERYLOG_SAMPLE_RATE
+        if settings.QUERYLOG_SLOW_MS is None and not sampled:
+            return self.get_response(request)
+        log = QueryLog(request, sampled)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        log.finish()
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет за основной базой пользователя, который только что
+    писал, чтобы он сразу видел свои изменения."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request(
+            pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+import traceback
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('yatube.queries')
+
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_TEMPLATE_RENDER = 'render_annotated'
+_LIBRARIES = os.path.dirname(os.path.dirname(sys.modules['django'].__file__))
+# Execute wrappers of this package sit on every query's stack.
+_WRAPPERS = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('querylog.py', 'metrics.py', 'middleware.py')
+}
+
+
+def shape(sql):
+    """Запрос без значений: списки IN (%s, %s, ...) и литералы свёрнуты."""
+    sql = _PLACEHOLDER_LIST.sub('%s, ...', sql)
+    return _LITERAL.sub('?', sql)
+
+
+def origin():
+    """Откуда выполнен запрос: строка кода проекта и строка шаблона."""
+    code = template = None
+    for frame, lineno in traceback.walk_stack(sys._getframe(1)):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == _TEMPLATE_RENDER:
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            node_origin = getattr(node, 'origin', None)
+            if token is not None and node_origin is not None:
+                template_name = node_origin.template_name or node_origin.name
+                template = f'{template_name}:{token.lineno}'
+        if (
+            code is None and filename.startswith(settings.BASE_DIR)
+            and filename not in _WRAPPERS
+            and not filename.startswith(_LIBRARIES)
+        ):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            code = f'{path}:{lineno} {frame.f_code.co_name}'
+        if code is not None and template is not None:
+            break
+    return {'code': code, 'template': template}
+
+
+class QueryLog:
+    """Обёртка запросов к базе для одного запроса к сайту.
+
+    Медленные запросы ловятся всегда: это одно измерение времени
+    на запрос. Повторы одинаковых запросов ищутся только в доле
+    QUERYLOG_SAMPLE_RATE запросов к сайту.
+    """
+
+    def __init__(self, request, sampled):
+        self.request = request
+        self.sampled = sampled
+        self.slow = settings.QUERYLOG_SLOW_MS
+        self.repeats = defaultdict(int)
+        self.durations = defaultdict(float)
+        self.repeated = {}
+
+    def view(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else '<unresolved>'
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            if self.slow is not None and elapsed >= self.slow:
+                self.log('slow', shape(sql), elapsed, 1, origin())
+            if self.sampled:
+                key = shape(sql)
+                self.repeats[key] += 1
+                self.durations[key] += elapsed
+                if self.repeats[key] == settings.QUERYLOG_REPEAT_THRESHOLD:
+                    self.repeated[key] = origin()
+
+    def finish(self):
+        for key, where in self.repeated.items():
+            self.log(
+                'repeated', key, self.durations[key], self.repeats[key], where
+            )
+
+    def log(self, kind, sql, duration, count, where):
+        logger.warning(json.dumps({
+            'time': timezone.now().isoformat(),
+            'kind': kind,
+            'view': self.view(),
+            'path': self.request.path,
+            'sql': sql,
+            'count': count,
+            'ms': round(duration, 3),
+            **where,
+        }, ensure_ascii=False))
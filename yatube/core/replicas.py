@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+
+from core.routers import PRIMARY
+
+
+def copy_database(source, path):
+    """Копирует базу соединения source в файл SQLite через backup API.
+
+    Копия делается за один шаг, поэтому читатели реплики видят либо
+    старое, либо новое состояние целиком.
+    """
+    source.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+def refresh_replicas():
+    """Обновляет SQLite-реплики из основной базы, возвращает их алиасы."""
+    source = connections[PRIMARY]
+    refreshed = []
+    for alias in settings.DATABASE_REPLICAS:
+        if connections[alias].vendor != 'sqlite':
+            continue
+        copy_database(source, connections[alias].settings_dict['NAME'])
+        refreshed.append(alias)
+    return refreshed
@@ -0,0 +1,52 @@
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_local = threading.local()
+
+
+def start_request(pinned):
+    _local.pinned = pinned
+    _local.wrote = False
+
+
+def finish_request():
+    """Писал ли запрос в базу; поток снова читает с основной базы."""
+    wrote = getattr(_local, 'wrote', False)
+    _local.pinned = True
+    _local.wrote = False
+    return wrote
+
+
+class ReplicaRouter:
+    """Чтение моделей REPLICATED_APPS идёт на случайную реплику.
+
+    Запись всегда на основную базу. После записи чтения этого потока
+    и, через куку REPLICA_PIN_COOKIE, запросы того же пользователя
+    в течение REPLICA_STICKY_SECONDS тоже идут на основную базу:
+    реплика может ещё не получить изменения. Вне запросов к сайту
+    (миграции, команды) всё читается с основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or model._meta.app_label not in settings.REPLICATED_APPS
+            or getattr(_local, 'pinned', True)
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _local.pinned = _local.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
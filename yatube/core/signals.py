@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настройки SQLITE_PRAGMAS для каждого нового соединения.
+
+    Они идут мимо обёрток запросов, чтобы не попадать в метрики
+    и число запросов страницы.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
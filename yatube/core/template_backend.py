@@ -0,0 +1,23 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from core.metrics import template_timer
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with template_timer():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонизатор Django, который замеряет время отрисовки."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
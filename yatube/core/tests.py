@@ -1,6 +1,32 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template import engines
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core import routers
+from core.backends.cache import SQLiteCache
+from core.metrics import registry
+from core.middleware import QueryLogMiddleware, ReplicaPinMiddleware
+from core.replicas import copy_database
+from posts.cache import feed_generation, object_versions
+from posts.models import Comment, Post, User
+
+METRICS_AUTH = {'HTTP_AUTHORIZATION': 'Bearer secret'}
 
 
 class ViewTestClass(TestCase):
@@ -10,3 +36,393 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_request_metrics_by_view(self):
+        """Для вью считаются запросы, время, обращения к базе,
+        отрисовка шаблонов и попадания в кэш"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'), **METRICS_AUTH)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        labels = '{view="posts:index"}'
+        self.assertIn(f'yatube_request_duration_seconds_count{labels} 2', text)
+        self.assertIn(f'yatube_db_queries_count{labels} 2', text)
+        self.assertIn(
+            'yatube_responses_total{status="200",view="posts:index"} 2',
+            text,
+        )
+        self.assertIn(
+            'yatube_cache_requests_total'
+            '{cache="index_page",result="hit",view="posts:index"} 1',
+            text,
+        )
+        snapshot = registry.snapshot()
+        template_time = next(
+            total for name, labels, counts, total, count
+            in snapshot['histograms']
+            if name == 'yatube_template_duration_seconds'
+            and labels == {'view': 'posts:index'}
+        )
+        self.assertGreater(template_time, 0)
+
+    def test_metrics_of_other_processes_are_summed(self):
+        """Страница метрик складывает снимки всех процессов"""
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            with override_settings(METRICS_DIR=metrics_dir):
+                self.client.get(reverse('posts:index'))
+                registry.flush()
+                other = os.path.join(metrics_dir, 'other.json')
+                own = os.path.join(metrics_dir, f'{os.getpid()}.json')
+                with open(own) as file:
+                    snapshot = file.read()
+                with open(other, 'w') as file:
+                    file.write(snapshot)
+                response = self.client.get(reverse('metrics'), **METRICS_AUTH)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text,
+        )
+
+    def test_metrics_need_token(self):
+        """Метрики недоступны без токена METRICS_TOKEN, с чужим токеном
+        и вовсе закрыты, пока токен не задан"""
+        requests = {
+            'без токена': ('secret', {}),
+            'чужой токен': (
+                'secret', {'HTTP_AUTHORIZATION': 'Bearer other'}
+            ),
+            'токен не задан': (None, {'HTTP_AUTHORIZATION': 'Bearer None'}),
+        }
+        for name, (token, headers) in requests.items():
+            with self.subTest(name=name):
+                with override_settings(METRICS_TOKEN=token):
+                    response = self.client.get(reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+@override_settings(QUERYLOG_SAMPLE_RATE=1, QUERYLOG_SLOW_MS=None)
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(6):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(author=author, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_repeated_queries_are_logged_with_template_line(self):
+        """Запрос, повторённый для каждого поста в шаблоне,
+        попадает в журнал один раз со строкой шаблона"""
+        template = engines.all()[0].from_string(
+            '{% for post in posts %}\n{{ post.author.username }}\n'
+            '{% endfor %}'
+        )
+
+        def view(request):
+            return HttpResponse(template.render({
+                'posts': Post.objects.all(),
+            }))
+
+        middleware = QueryLogMiddleware(view)
+        with self.assertLogs('yatube.queries') as logs:
+            middleware(RequestFactory().get('/'))
+        record, = self.records(logs)
+        self.assertEqual(record['kind'], 'repeated')
+        self.assertEqual(record['count'], 6)
+        self.assertIn('"auth_user"', record['sql'])
+        self.assertTrue(record['template'].endswith(':2'))
+
+    @override_settings(QUERYLOG_SLOW_MS=0)
+    def test_slow_queries_are_logged_with_view(self):
+        """Медленный запрос записывается с именем вью и строкой кода"""
+        with self.assertLogs('yatube.queries') as logs:
+            self.client.get(reverse('posts:index'))
+        record = self.records(logs)[0]
+        self.assertEqual(record['kind'], 'slow')
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertTrue(record['code'].startswith('posts'))
+
+    def test_feed_has_no_repeated_queries(self):
+        """Лента не делает повторяющихся запросов"""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.queries'):
+                self.client.get(reverse('posts:index'))
+
+    def test_querystats_summary(self):
+        """querystats складывает записи по форме запроса"""
+        record = {
+            'kind': 'repeated', 'view': 'posts:index', 'path': '/',
+            'sql': 'SELECT 1', 'count': 10, 'ms': 2.5,
+            'code': 'posts/views.py:10 index', 'template': None,
+        }
+        with tempfile.TemporaryDirectory() as log_dir:
+            path = os.path.join(log_dir, 'queries.log')
+            with open(path, 'w') as file:
+                for _ in range(2):
+                    file.write(json.dumps(record) + '\n')
+                file.write('не json\n')
+            out = StringIO()
+            call_command('querystats', path, stdout=out)
+        text = out.getvalue()
+        self.assertIn('событий 2, запросов 20, всего 5.0 мс', text)
+        self.assertIn('posts:index ×2', text)
+        self.assertIn('posts/views.py:10 index', text)
+
+
+class SQLiteTests(TransactionTestCase):
+    def test_connection_pragmas(self):
+        """Новое соединение получает настройки из SQLITE_PRAGMAS"""
+        connection.ensure_connection()
+        for name in ('busy_timeout', 'cache_size'):
+            with self.subTest(pragma=name):
+                value, = connection.connection.execute(
+                    f'PRAGMA {name}'
+                ).fetchone()
+                self.assertEqual(value, settings.SQLITE_PRAGMAS[name])
+
+    def test_transactions_begin_immediate(self):
+        """Транзакция сразу берёт блокировку записи"""
+        statements = []
+
+        def collect(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            with transaction.atomic():
+                Post.objects.exists()
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaTests(TransactionTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_feed_reads_go_to_replica_until_write(self):
+        """Чтение постов в запросе идёт на реплику, пока запрос
+        ничего не записал; пользователи читаются с основной базы"""
+        routers.start_request(pinned=False)
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_read(User), 'default')
+            self.assertEqual(self.router.db_for_write(Comment), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            routers.finish_request()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writer_is_pinned_to_primary(self):
+        """После записи пользователь получает куку и следующие
+        его запросы читают с основной базы"""
+        reads = []
+
+        def write(request):
+            self.router.db_for_write(Post)
+            return HttpResponse()
+
+        def read(request):
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(write)(RequestFactory().post('/'))
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        response = ReplicaPinMiddleware(read)(request)
+        ReplicaPinMiddleware(read)(RequestFactory().get('/'))
+        self.assertEqual(reads, ['default', 'replica'])
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_copy_database(self):
+        """Реплика получает копию основной базы"""
+        author = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(author=author, text='Тестовый пост')
+        with tempfile.TemporaryDirectory() as replica_dir:
+            path = os.path.join(replica_dir, 'replica.sqlite3')
+            copy_database(connection, path)
+            replica = sqlite3.connect(path)
+            try:
+                text, = replica.execute(
+                    'SELECT text FROM posts_post'
+                ).fetchone()
+            finally:
+                replica.close()
+        self.assertEqual(text, 'Тестовый пост')
+
+    def test_refresh_drops_pages_of_stale_replica(self):
+        """После обновления реплик меняются поколение ленты и общая
+        версия страниц: их ETag и кэш больше не действуют"""
+        generation = feed_generation()
+        versions = object_versions()
+        with mock.patch(
+            'core.management.commands.refresh_replicas.refresh_replicas',
+            return_value=['replica'],
+        ):
+            call_command('refresh_replicas', stdout=StringIO())
+        self.assertNotEqual(feed_generation(), generation)
+        self.assertNotEqual(object_versions(), versions)
+
+
+def increment(backend, times):
+    for _ in range(times):
+        backend.incr('counter')
+    backend.set('child', os.getpid())
+
+
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+
+    def backend(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_cache_operations(self):
+        """Кэш хранит значения со сроком жизни, add не заменяет
+        живую запись, incr работает только для чисел"""
+        backend = self.backend(COMPRESS_MIN_BYTES=100)
+        value = {'text': 'Тестовый пост' * 100, 'id': 1}
+        backend.set('post', value)
+        backend.set('short', 1, timeout=-1)
+        self.assertEqual(backend.get('post'), value)
+        self.assertIsNone(backend.get('short'))
+        self.assertFalse(backend.add('post', 'другое'))
+        self.assertTrue(backend.add('short', 5))
+        self.assertEqual(backend.incr('short', 2), 7)
+        with self.assertRaises(ValueError):
+            backend.incr('missing')
+        self.assertEqual(
+            backend.get_many(['post', 'short', 'missing']),
+            {'post': value, 'short': 7},
+        )
+        self.assertTrue(backend.touch('short', timeout=-1))
+        self.assertFalse(backend.has_key('short'))
+        size, compressed = sqlite3.connect(self.path).execute(
+            'SELECT size, compressed FROM cache WHERE key LIKE ?', ('%post',)
+        ).fetchone()
+        self.assertEqual(compressed, 1)
+        self.assertLess(size, len('Тестовый пост' * 100))
+
+    def test_workers_share_entries(self):
+        """Процессы видят записи друг друга, incr из них атомарен"""
+        backend = self.backend()
+        backend.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(backend, 100))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        increment(backend, 100)
+        for worker in workers:
+            worker.join()
+        self.assertEqual(backend.get('counter'), 300)
+        self.assertIn(
+            self.backend().get('child'),
+            [worker.pid for worker in workers] + [os.getpid()],
+        )
+
+    def test_least_recently_read_entries_are_evicted(self):
+        """За пределами MAX_BYTES вытесняются давно не читанные записи"""
+        backend = self.backend(MAX_BYTES=3000, CULL_FREQUENCY=3)
+        clock = mock.Mock()
+        with mock.patch('core.backends.cache.time', clock):
+            for number in range(5):
+                clock.time.return_value = 100 + 10 * number
+                backend.set(f'key{number}', b'x' * 500)
+            clock.time.return_value = 200
+            self.assertIsNotNone(backend.get('key0'))
+            clock.time.return_value = 210
+            backend.set('key5', b'x' * 500)
+            backend.set('key6', b'x' * 500)
+            self.assertEqual(
+                sorted(backend.get_many(
+                    [f'key{number}' for number in range(7)]
+                )),
+                ['key0', 'key4', 'key5', 'key6'],
+            )
+
+
+def change_cache():
+    cache.set('key', 'новое')
+    cache.incr('counter')
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN='secret')
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_repeated_reads_stay_in_process(self):
+        """Повторное чтение не идёт в общий кэш и отдаёт копию,
+        которую нельзя испортить"""
+        cache.set('key', {'text': 'Тестовый пост'})
+        cache.get('key')['text'] = 'Испорчено'
+        shared = caches['shared']
+        with mock.patch.object(shared, 'get', side_effect=AssertionError):
+            with mock.patch.object(
+                shared, 'get_many', side_effect=AssertionError
+            ):
+                self.assertEqual(
+                    cache.get_many(['key']), {'key': {'text': 'Тестовый пост'}}
+                )
+
+    def test_changes_of_other_workers_are_seen_next_request(self):
+        """Запись из другого процесса выбрасывает ключ из памяти
+        процесса к началу следующего запроса"""
+        cache.set('key', 'старое')
+        cache.set('counter', 1)
+        self.assertEqual(cache.get('key'), 'старое')
+        worker = multiprocessing.get_context('fork').Process(
+            target=change_cache
+        )
+        worker.start()
+        worker.join()
+        request_started.send(sender=None)
+        self.assertEqual(
+            cache.get_many(['key', 'counter']),
+            {'key': 'новое', 'counter': 2},
+        )
+
+    def test_hits_by_tier_in_metrics(self):
+        """Метрики считают попадания в память процесса и в общий кэш"""
+        Post.objects.create(
+            author=User.objects.create_user(username='TestAuthor'),
+            text='Тестовый пост',
+        )
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'), **METRICS_AUTH)
+        text = response.content.decode()
+        for tier in ('l1', 'l2'):
+            with self.subTest(tier=tier):
+                self.assertIn(
+                    f'yatube_cache_requests_total{{cache="{tier}",'
+                    'result="hit",view="posts:index"}',
+                    text,
+                )
@@ -1,5 +1,12 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from core.metrics import registry, render_prometheus
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,16 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики в формате Prometheus, только с токеном METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    given = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(given, f'Bearer {token}'):
+        raise PermissionDenied
+    registry.flush()
+    return HttpResponse(
+        render_prometheus(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
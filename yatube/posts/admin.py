@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from posts.models import Comment, Group, Post
+from posts.search import search_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +11,19 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def save_model(self, request, obj, form, change):
+        if change:
+            obj.save_without_counters()
+        else:
+            super().save_model(request, obj, form, change)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(
+            id__in=search_posts(search_term).values('id')
+        ), False
+
 
 admin.site.register(Post, PostAdmin)
 
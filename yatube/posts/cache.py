@@ -0,0 +1,209 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import quote_etag
+
+from core.metrics import record_cache
+
+FEED_GENERATION_KEY = 'feed:generation'
+VERSION_KEY = 'version:{}:{}'
+# Bumped by bulk changes that bypass signals: every version changes.
+ALL_VERSIONS = ('all', 0)
+# Bumped on every post change, for pages that list posts of everyone.
+POST_STREAM = ('stream', 0)
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, name, hits=0, misses=0):
+        with self._lock:
+            self._counts[(name, 'hit')] += hits
+            self._counts[(name, 'miss')] += misses
+        record_cache(name, hits, misses)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        names = {name for name, _ in counts}
+        return {
+            name: {
+                'hits': counts.get((name, 'hit'), 0),
+                'misses': counts.get((name, 'miss'), 0),
+            }
+            for name in names
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def feed_generation():
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        cache.add(FEED_GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(FEED_GENERATION_KEY)
+    return generation
+
+
+def bump_feed_generation():
+    try:
+        cache.incr(FEED_GENERATION_KEY)
+    except ValueError:
+        feed_generation()
+
+
+def page_cache_key(key_prefix, path, user_id):
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return f'{key_prefix}:{user_id or 0}:{digest}'
+
+
+def cache_feed_page(timeout, key_prefix):
+    """Кэширует страницу до смены поколения ленты.
+
+    Запись хранит поколение, для которого страница отрисована. Устаревшую
+    страницу перерисовывает только тот процесс, что взял блокировку,
+    остальные до этого отдают старую копию.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(
+                key_prefix, request.get_full_path(), request.user.pk
+            )
+            generation = feed_generation()
+            entry = cache.get(key)
+            if entry is not None and entry[0] == generation:
+                cache_stats.record(key_prefix, hits=1)
+                return entry[1]
+            cache_stats.record(key_prefix, misses=1)
+            lock_key = f'{key}:lock'
+            locked = cache.add(
+                lock_key, generation, settings.FEED_REBUILD_LOCK_TIMEOUT
+            )
+            if entry is not None and not locked:
+                return entry[1]
+            try:
+                response = view(request, *args, **kwargs)
+                if (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not response.cookies
+                ):
+                    cache.set(key, (generation, response), timeout)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
+
+
+def object_versions(*objects):
+    """Счётчики версий объектов (вид, pk), а также общий ALL_VERSIONS.
+
+    Как и поколение ленты, счётчик без записи в кэше начинается
+    с текущего времени, чтобы не повторить выданную раньше версию.
+    """
+    keys = [
+        VERSION_KEY.format(kind, pk)
+        for kind, pk in (ALL_VERSIONS, *objects) if pk is not None
+    ]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        start = int(time.time() * 1000)
+        for key in missing:
+            cache.add(key, start, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def bump_versions(*objects):
+    for kind, pk in objects:
+        if pk is None:
+            continue
+        try:
+            cache.incr(VERSION_KEY.format(kind, pk))
+        except ValueError:
+            # No version yet: the next read starts a new one.
+            pass
+
+
+def _patch_cache_headers(request, response):
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=settings.PAGE_PROXY_MAX_AGE,
+        )
+    patch_vary_headers(response, ('Cookie',))
+
+
+def conditional_page(validators, cache_timeout=None):
+    """Отвечает 304 без отрисовки, если страница не изменилась.
+
+    validators(request, *args, **kwargs) одним дешёвым запросом
+    возвращает объекты (вид, pk) или None, если объекта нет. ETag
+    собирается из версий объектов и id посетителя: страница зависит
+    от того, кто вошёл. Last-Modified не отдаётся: дата последнего
+    поста не меняется при правке, удалении или подписке, и проверка
+    по ней отвечала бы 304 на устаревшую страницу. Анонимные страницы может
+    хранить обратный прокси, личные — только браузер с проверкой.
+    С cache_timeout ответ ещё и хранится в кэше под своим ETag: новая
+    версия объекта меняет ключ, и старая копия больше не читается.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            objects = validators(request, *args, **kwargs)
+            if objects is None:
+                return view(request, *args, **kwargs)
+            etag = quote_etag('-'.join(
+                str(part) for part in
+                (request.user.pk or 0, *object_versions(*objects))
+            ))
+            response = get_conditional_response(request, etag=etag)
+            key = '{}:{}'.format(
+                page_cache_key(
+                    'conditional', request.get_full_path(), request.user.pk
+                ),
+                etag.strip('"'),
+            )
+            if response is None and cache_timeout is not None:
+                response = cache.get(key)
+                hit = int(response is not None)
+                cache_stats.record('conditional_page', hit, 1 - hit)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if cache_timeout is not None and not response.cookies:
+                    cache.set(key, response, cache_timeout)
+            response['ETag'] = etag
+            # Syndication feeds set it from the newest item.
+            del response['Last-Modified']
+            _patch_cache_headers(request, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,80 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.cache import ALL_VERSIONS, bump_versions
+from posts.models import Comment, Follow, Post, Profile, User
+
+PROFILE_COUNTERS = (
+    ('posts_count', Post, 'author'),
+    ('followers_count', Follow, 'author'),
+    ('following_count', Follow, 'user'),
+)
+POST_COUNTERS = (
+    ('comments_count', Comment, 'post'),
+)
+
+
+def change_profile(user_id, **deltas):
+    Profile.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def change_post(post_id, **deltas):
+    Post.objects.filter(pk=post_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def _count(model, lookup, outer):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{lookup: OuterRef(outer)}).order_by()
+            .values(lookup).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def id_batches(queryset, batch_size):
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def recount_profiles(user_ids):
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    Profile.objects.filter(user_id__in=user_ids).update(**{
+        field: _count(model, lookup, 'user')
+        for field, model, lookup in PROFILE_COUNTERS
+    })
+
+
+def recount_posts(post_ids):
+    Post.objects.filter(pk__in=post_ids).update(**{
+        field: _count(model, lookup, 'pk')
+        for field, model, lookup in POST_COUNTERS
+    })
+
+
+def recount_all(batch_size=1000, progress=None):
+    for ids in id_batches(User.objects.all(), batch_size):
+        recount_profiles(ids)
+        if progress:
+            progress('profiles', ids[-1])
+    for ids in id_batches(Post.objects.all(), batch_size):
+        recount_posts(ids)
+        if progress:
+            progress('posts', ids[-1])
+    bump_versions(ALL_VERSIONS)
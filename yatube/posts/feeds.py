@@ -0,0 +1,131 @@
+"""RSS и Atom: общий поток постов, посты группы и посты автора.
+
+Лента — последние SYNDICATION_ITEMS постов одним запросом по индексу
+(pub_date, id). Готовый ответ хранится в кэше под ETag из версий
+объектов, поэтому опрос без изменений не доходит ни до базы постов,
+ни до генерации XML, а с If-None-Match получает 304.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from posts.cache import POST_STREAM, conditional_page
+from posts.models import Group, User
+from posts.paginator import POST_ORDERING
+from posts.views import (group_post_list, group_validators, index_posts,
+                         profile_post_list, profile_validators)
+
+TITLE_WORDS = 8
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+
+    def description(self, obj):
+        return 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return index_posts()
+
+    def items(self, obj):
+        return self.posts(obj).order_by(
+            *POST_ORDERING
+        )[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(TITLE_WORDS)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group_id else ()
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+    def posts(self, obj):
+        return group_post_list(obj)
+
+
+class ProfileFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def posts(self, obj):
+        return profile_post_list(obj)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class ProfileAtomFeed(AtomMixin, ProfileFeed):
+    pass
+
+
+def stream_validators(request):
+    return (POST_STREAM,)
+
+
+def _feed(feed, validators):
+    return conditional_page(
+        validators, settings.SYNDICATION_CACHE_TIMEOUT
+    )(feed())
+
+
+posts_rss = _feed(PostsFeed, stream_validators)
+posts_atom = _feed(PostsAtomFeed, stream_validators)
+group_rss = _feed(GroupFeed, group_validators)
+group_atom = _feed(GroupAtomFeed, group_validators)
+profile_rss = _feed(ProfileFeed, profile_validators)
+profile_atom = _feed(ProfileAtomFeed, profile_validators)
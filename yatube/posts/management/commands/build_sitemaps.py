@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import INDEX_NAME, build
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает карту сайта в gzip-файлы для отдачи веб-сервером: '
+        'индекс и части по SITEMAP_SHARD_SIZE адресов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.SITEMAP_ROOT,
+            help='Каталог для файлов, по умолчанию SITEMAP_ROOT.',
+        )
+        parser.add_argument(
+            '--base-url', default=settings.SITEMAP_BASE_URL,
+            help='Адрес сайта для ссылок, по умолчанию SITEMAP_BASE_URL.',
+        )
+        parser.add_argument(
+            '--files-url', default=settings.SITEMAP_URL,
+            help='Путь, по которому веб-сервер отдаёт каталог файлов.',
+        )
+
+    def handle(self, *args, **options):
+        def progress(filename):
+            if options['verbosity'] > 1:
+                self.stdout.write(filename)
+
+        shards = build(
+            options['output'], options['base_url'].rstrip('/'),
+            options['files_url'], progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Частей карты сайта: {shards}, индекс: '
+            f'{options["base_url"].rstrip("/")}{options["files_url"]}'
+            f'{INDEX_NAME}'
+        ))
@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import export_rows, read_checkpoint, write_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в файл NDJSON '
+        'потоком, не загружая таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную выгрузку с контрольной точки.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <output>.checkpoint.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint_path = (
+            options['checkpoint'] or f"{options['output']}.checkpoint"
+        )
+        state = read_checkpoint(checkpoint_path) if options['resume'] else None
+        if state:
+            # Lines written after the last checkpoint may be incomplete.
+            with open(options['output'], 'r+b') as file:
+                file.truncate(state['offset'])
+            self.stdout.write(
+                f"Продолжение с {state['model']} id>{state['last_id']}"
+            )
+        with open(options['output'], 'ab' if state else 'wb') as file:
+            def write(line):
+                file.write(line.encode())
+
+            def checkpoint(model, last_id, rows):
+                file.flush()
+                write_checkpoint(checkpoint_path, {
+                    'model': model, 'last_id': last_id,
+                    'offset': file.tell(),
+                })
+                if options['verbosity'] > 0:
+                    self.stdout.write(f'{model}: {rows}')
+
+            export_rows(write, options['chunk_size'], state, checkpoint)
+        os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import backfill_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры картинок постов, у которых их ещё нет: '
+        'посты из загрузки, seed или админки до появления миниатюр.'
+    )
+
+    def handle(self, *args, **options):
+        def progress(name):
+            if options['verbosity'] > 1:
+                self.stdout.write(name)
+
+        count = backfill_thumbnails(progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'Миниатюры созданы для картинок: {count}.')
+        )
@@ -0,0 +1,64 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (finish_import, import_rows, read_checkpoint,
+                            write_checkpoint)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками bulk_create, '
+        'фиксируя транзакцию после каждой пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Строк в одном INSERT; SQLite допускает не больше 500.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с контрольной точки.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <input>.checkpoint.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint_path = (
+            options['checkpoint'] or f"{options['input']}.checkpoint"
+        )
+        state = read_checkpoint(checkpoint_path) if options['resume'] else None
+
+        def checkpoint(model, offset, rows):
+            write_checkpoint(
+                checkpoint_path, {'model': model, 'offset': offset}
+            )
+            if options['verbosity'] > 0:
+                self.stdout.write(f'{model}: {rows}')
+
+        try:
+            with open(options['input'], 'rb') as file:
+                if state:
+                    file.seek(state['offset'])
+                    self.stdout.write(f"Продолжение с байта {state['offset']}")
+                rows = import_rows(
+                    file, options['batch_size'], options['chunk_size'],
+                    checkpoint,
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        self.stdout.write('Пересборка лент и счётчиков...')
+        finish_import()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(
+            self.style.SUCCESS(f'Загружено записей: {rows}.')
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Переиндексирует посты и комментарии для полнотекстового поиска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def progress(model_name, last_id):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{model_name}: до id={last_id}')
+
+        rebuild_index(options['batch_size'], progress)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов, подписчиков, подписок '
+        'и комментариев пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def progress(name, last_id):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name}: до id={last_id}')
+
+        recount_all(options['batch_size'], progress)
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(model, lookup, outer):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{lookup: OuterRef(outer)}).order_by()
+            .values(lookup).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Profile = apps.get_model('posts', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Profile.objects.bulk_create(
+        (
+            Profile(user_id=user_id)
+            for user_id in User.objects.values_list('pk', flat=True)
+        ),
+        batch_size=1000,
+    )
+    Profile.objects.update(
+        posts_count=count(Post, 'author', 'user'),
+        followers_count=count(Follow, 'author', 'user'),
+        following_count=count(Follow, 'user', 'user'),
+    )
+    Post.objects.update(comments_count=count(Comment, 'post', 'pk'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_add_updated_to_model_Post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('followers_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Количество подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль',
+                'verbose_name_plural': 'Профили',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import posts.models
+
+COMMENTS_SQL = (
+    "(SELECT coalesce(group_concat(text, char(10)), '') "
+    "FROM posts_comment WHERE post_id = {})"
+)
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE posts_search USING fts5("
+    "text, comments, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO posts_search(posts_search, rank) "
+    "VALUES ('rank', 'bm25(2.0, 1.0)')",
+    "CREATE TRIGGER posts_search_post_insert AFTER INSERT ON posts_post "
+    "BEGIN "
+    "INSERT INTO posts_search(rowid, text, comments) "
+    "VALUES (new.id, new.text, ''); "
+    "END",
+    "CREATE TRIGGER posts_search_post_update AFTER UPDATE OF text "
+    "ON posts_post WHEN old.text IS NOT new.text "
+    "BEGIN "
+    "UPDATE posts_search SET text = new.text WHERE rowid = new.id; "
+    "END",
+    "CREATE TRIGGER posts_search_post_delete AFTER DELETE ON posts_post "
+    "BEGIN "
+    "DELETE FROM posts_search WHERE rowid = old.id; "
+    "END",
+    "CREATE TRIGGER posts_search_comment_insert AFTER INSERT "
+    "ON posts_comment "
+    "BEGIN "
+    "UPDATE posts_search SET comments = {new} WHERE rowid = new.post_id; "
+    "END".format(new=COMMENTS_SQL.format('new.post_id')),
+    "CREATE TRIGGER posts_search_comment_update AFTER UPDATE OF text, post_id "
+    "ON posts_comment "
+    "WHEN old.text IS NOT new.text OR old.post_id IS NOT new.post_id "
+    "BEGIN "
+    "UPDATE posts_search SET comments = {old} WHERE rowid = old.post_id; "
+    "UPDATE posts_search SET comments = {new} WHERE rowid = new.post_id; "
+    "END".format(
+        old=COMMENTS_SQL.format('old.post_id'),
+        new=COMMENTS_SQL.format('new.post_id'),
+    ),
+    "CREATE TRIGGER posts_search_comment_delete AFTER DELETE "
+    "ON posts_comment "
+    "BEGIN "
+    "UPDATE posts_search SET comments = {old} WHERE rowid = old.post_id; "
+    "END".format(old=COMMENTS_SQL.format('old.post_id')),
+    "INSERT INTO posts_search(rowid, text, comments) "
+    "SELECT id, text, {} FROM posts_post".format(
+        COMMENTS_SQL.format('posts_post.id')
+    ),
+]
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS posts_search_post_insert',
+    'DROP TRIGGER IF EXISTS posts_search_post_update',
+    'DROP TRIGGER IF EXISTS posts_search_post_delete',
+    'DROP TRIGGER IF EXISTS posts_search_comment_insert',
+    'DROP TRIGGER IF EXISTS posts_search_comment_update',
+    'DROP TRIGGER IF EXISTS posts_search_comment_delete',
+    'DROP TABLE IF EXISTS posts_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_add_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('text', models.TextField(verbose_name='Текст поста')),
+                ('comments', models.TextField(verbose_name='Текст комментариев')),
+                ('document', posts.models.SearchDocumentField(db_column='posts_search')),
+                ('rank', models.FloatField(verbose_name='Релевантность')),
+            ],
+            options={
+                'verbose_name': 'Поисковый индекс',
+                'verbose_name_plural': 'Поисковый индекс',
+                'db_table': 'posts_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
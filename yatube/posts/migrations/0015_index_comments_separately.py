@@ -0,0 +1,78 @@
+from importlib import import_module
+
+from django.db import migrations
+
+previous = import_module('posts.migrations.0013_add_PostSearch_index')
+
+# A post row keeps rowid = post id, every comment gets its own row with
+# rowid = -comment id, so a new comment is one insert instead of
+# re-concatenating every comment of the post.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE posts_search USING fts5("
+    "text, comments, post_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO posts_search(posts_search, rank) "
+    "VALUES ('rank', 'bm25(2.0, 1.0)')",
+    "CREATE TRIGGER posts_search_post_insert AFTER INSERT ON posts_post "
+    "BEGIN "
+    "INSERT INTO posts_search(rowid, text, comments, post_id) "
+    "VALUES (new.id, new.text, '', new.id); "
+    "END",
+    "CREATE TRIGGER posts_search_post_update AFTER UPDATE OF text "
+    "ON posts_post WHEN old.text IS NOT new.text "
+    "BEGIN "
+    "UPDATE posts_search SET text = new.text WHERE rowid = new.id; "
+    "END",
+    "CREATE TRIGGER posts_search_post_delete AFTER DELETE ON posts_post "
+    "BEGIN "
+    "DELETE FROM posts_search WHERE rowid = old.id; "
+    "END",
+    "CREATE TRIGGER posts_search_comment_insert AFTER INSERT "
+    "ON posts_comment "
+    "BEGIN "
+    "INSERT INTO posts_search(rowid, text, comments, post_id) "
+    "VALUES (-new.id, '', new.text, new.post_id); "
+    "END",
+    "CREATE TRIGGER posts_search_comment_update AFTER UPDATE OF text, post_id "
+    "ON posts_comment "
+    "WHEN old.text IS NOT new.text OR old.post_id IS NOT new.post_id "
+    "BEGIN "
+    "UPDATE posts_search SET comments = new.text, post_id = new.post_id "
+    "WHERE rowid = -new.id; "
+    "END",
+    "CREATE TRIGGER posts_search_comment_delete AFTER DELETE "
+    "ON posts_comment "
+    "BEGIN "
+    "DELETE FROM posts_search WHERE rowid = -old.id; "
+    "END",
+    "INSERT INTO posts_search(rowid, text, comments, post_id) "
+    "SELECT id, text, '', id FROM posts_post",
+    "INSERT INTO posts_search(rowid, text, comments, post_id) "
+    "SELECT -id, '', text, post_id FROM posts_comment",
+]
+
+
+def _run(schema_editor, statements):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def split_comments(apps, schema_editor):
+    _run(schema_editor, previous.DROP_SQL + CREATE_SQL)
+
+
+def join_comments(apps, schema_editor):
+    _run(schema_editor, previous.DROP_SQL + previous.CREATE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_add_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_comments, join_comments),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_comment_index_by_id'),
+    ]
+
+    # editable has no column behind it, while SQLite would rebuild
+    # posts_post for an AlterField and drop the search triggers on it.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='comments_count',
+                field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+            ),
+            migrations.AlterField(
+                model_name='profile',
+                name='followers_count',
+                field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Количество подписчиков'),
+            ),
+            migrations.AlterField(
+                model_name='profile',
+                name='following_count',
+                field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписок'),
+            ),
+            migrations.AlterField(
+                model_name='profile',
+                name='posts_count',
+                field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+            ),
+        ]),
+    ]
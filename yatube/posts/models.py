@@ -30,6 +30,38 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class Profile(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name='Количество подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписок',
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -40,6 +72,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         db_index=True,
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -60,15 +96,82 @@ class Post(models.Model):
         blank=True,
         verbose_name='Картинка',
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+
+    # Changed only by atomic UPDATEs in posts.counters.
+    COUNTER_FIELDS = {'comments_count'}
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:DISPLAYED_LETTERS]
 
+    def save_without_counters(self):
+        """Сохраняет изменения поста, не трогая счётчики: значение,
+        прочитанное в начале запроса, могло уже устареть."""
+        self.save(update_fields=[
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.COUNTER_FIELDS
+        ])
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы, к нему применяется MATCH."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс FTS5 по постам и комментариям к ним.
+
+    Строка поста (rowid = id поста) хранит его текст, у каждого
+    комментария своя строка (rowid = -id комментария), поэтому новый
+    комментарий индексируется одной вставкой, не переписывая остальные.
+    Таблица создаётся миграцией и поддерживается триггерами SQLite.
+    """
+    id = models.IntegerField(primary_key=True, db_column='rowid')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        related_name='search',
+        verbose_name='Пост',
+    )
+    text = models.TextField(verbose_name='Текст поста')
+    comments = models.TextField(verbose_name='Текст комментария')
+    document = SearchDocumentField(db_column='posts_search')
+    rank = models.FloatField(verbose_name='Релевантность')
+
+    class Meta:
+        managed = False
+        db_table = 'posts_search'
+        verbose_name = 'Поисковый индекс'
+        verbose_name_plural = 'Поисковый индекс'
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -97,6 +200,12 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:DISPLAYED_LETTERS]
@@ -123,3 +232,38 @@ class Follow(models.Model):
                 name='unique_name_is_following_author'
             )
         ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx'
+            )
+        ]
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import datetime
+import json
+from copy import copy
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+NEXT = 'next'
+PREVIOUS = 'prev'
+POST_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('-created', '-id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по ключу сортировки (keyset).
+
+    Вместо OFFSET и COUNT(*) страница выбирается условием по значениям
+    полей сортировки последнего (первого) объекта соседней страницы,
+    поэтому стоимость запроса не зависит от глубины страницы.
+    Страница остаётся обычным Page: номер и число страниц у неё
+    условные (предыдущая, текущая, следующая), а ссылки на соседние
+    страницы лежат в атрибутах next_cursor и previous_cursor.
+    """
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.object_list = object_list.order_by(*self.ordering)
+
+    def _fields(self):
+        return [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def _model_field(self, name):
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            value.isoformat()
+            if isinstance(value, (datetime.date, datetime.time)) else value
+            for value in (getattr(obj, name) for name, _ in self._fields())
+        ]
+        data = json.dumps([direction, values])
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        padding = '=' * (-len(cursor) % 4)
+        try:
+            data = base64.urlsafe_b64decode(cursor + padding)
+            direction, values = json.loads(data.decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        fields = self._fields()
+        if direction not in (NEXT, PREVIOUS) or len(values) != len(fields):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._model_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _keyset_filter(self, values, forward):
+        """Строки за курсором. Граница по первому полю сортировки
+        дублирует условие, но даёт SQLite диапазон для поиска по
+        индексу: без неё индекс обходится от начала ленты."""
+        first, descending = self._fields()[0]
+        bound = 'lte' if descending == forward else 'gte'
+        condition = Q()
+        for position, (name, descending) in enumerate(self._fields()):
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {
+                field: value
+                for (field, _), value in zip(
+                    self._fields()[:position], values[:position]
+                )
+            }
+            equal['%s__%s' % (name, lookup)] = values[position]
+            condition |= Q(**equal)
+        return Q(**{'%s__%s' % (first, bound): values[0]}) & condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else '-' + name
+            for name in self.ordering
+        ]
+
+    def _build_page(self, object_list, has_next, has_previous):
+        paginator = copy(self)
+        number = 2 if has_previous else 1
+        paginator.num_pages = number + 1 if has_next else number
+        page = Page(object_list, number, paginator)
+        page.is_cursor = True
+        page.next_cursor = page.previous_cursor = None
+        if has_next and object_list:
+            page.next_cursor = self.encode_cursor(NEXT, object_list[-1])
+        if has_previous and object_list:
+            page.previous_cursor = self.encode_cursor(
+                PREVIOUS, object_list[0]
+            )
+        return page
+
+    def page(self, cursor=None):
+        if not cursor:
+            objects = list(self.object_list[:self.per_page + 1])
+            return self._build_page(
+                objects[:self.per_page],
+                has_next=len(objects) > self.per_page,
+                has_previous=False,
+            )
+        direction, values = self.decode_cursor(cursor)
+        if direction == NEXT:
+            objects = list(
+                self.object_list.filter(
+                    self._keyset_filter(values, forward=True)
+                )[:self.per_page + 1]
+            )
+            return self._build_page(
+                objects[:self.per_page],
+                has_next=len(objects) > self.per_page,
+                has_previous=True,
+            )
+        objects = list(
+            self.object_list.filter(
+                self._keyset_filter(values, forward=False)
+            ).order_by(*self._reversed_ordering())[:self.per_page + 1]
+        )
+        return self._build_page(
+            objects[:self.per_page][::-1],
+            has_next=True,
+            has_previous=len(objects) > self.per_page,
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
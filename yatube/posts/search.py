@@ -0,0 +1,79 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Min, Value
+
+from posts.counters import id_batches
+from posts.models import Comment, Post
+
+SEARCH_ORDERING = ('search_rank', '-id')
+# Posts and comments are indexed in rows of their own: rowid is the post
+# id for a post and minus the comment id for a comment.
+INDEX_ROWS = {
+    Post: (1, "SELECT id, text, '', id FROM posts_post"),
+    Comment: (-1, "SELECT -id, '', text, post_id FROM posts_comment"),
+}
+INSERT_SQL = 'INSERT INTO posts_search(rowid, text, comments, post_id) '
+
+
+def search_query(text):
+    """Запрос FTS5 из ввода пользователя: все слова, каждое по префиксу.
+
+    Слова берутся в кавычки, поэтому операторы и спецсимволы FTS5
+    в строке поиска не приводят к ошибке синтаксиса.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_posts(text, queryset=None):
+    """Посты, в тексте которых или в одном из комментариев к которым
+    есть все слова.
+
+    Аннотация search_rank — лучшая оценка BM25 среди строк поста
+    и его комментариев (чем меньше, тем релевантнее), сортировка
+    по ней и по id подходит для CursorPaginator.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    query = search_query(text)
+    if not query:
+        return queryset.none().annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    return queryset.filter(search__document__match=query).annotate(
+        search_rank=Min('search__rank')
+    ).order_by(*SEARCH_ORDERING)
+
+
+def rebuild_index(batch_size=1000, progress=None):
+    """Переиндексирует посты, затем комментарии пачками, не очищая
+    индекс целиком.
+
+    Пока идёт перестройка, поиск продолжает работать по старым данным.
+    """
+    for model, (sign, select) in INDEX_ROWS.items():
+        for ids in id_batches(model.objects.all(), batch_size):
+            placeholders = ', '.join(['%s'] * len(ids))
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM posts_search '
+                    'WHERE rowid BETWEEN %s AND %s',
+                    sorted([sign * ids[0], sign * ids[-1]]),
+                )
+                cursor.execute(
+                    f'{INSERT_SQL}{select} WHERE id IN ({placeholders})', ids
+                )
+            if progress:
+                progress(model._meta.model_name, ids[-1])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM posts_search WHERE rowid > 0 '
+            'AND rowid NOT IN (SELECT id FROM posts_post)'
+        )
+        cursor.execute(
+            'DELETE FROM posts_search WHERE rowid < 0 '
+            'AND -rowid NOT IN (SELECT id FROM posts_comment)'
+        )
+        cursor.execute(
+            "INSERT INTO posts_search(posts_search) VALUES ('optimize')"
+        )
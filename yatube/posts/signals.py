@@ -0,0 +1,136 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from posts import timeline
+from posts.cache import POST_STREAM, bump_feed_generation, bump_versions
+from posts.counters import change_post, change_profile
+from posts.models import Comment, Follow, Group, Post, Profile, User
+from posts.thumbnails import queue_thumbnails
+
+# User fields a post card shows.
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feeds(sender, **kwargs):
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_profile(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_profile(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_post(instance.post_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_post(instance.post_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_profile(instance.author_id, followers_count=1)
+        change_profile(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    change_profile(instance.author_id, followers_count=-1)
+    change_profile(instance.user_id, following_count=-1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, raw=False, **kwargs):
+    """Пост могут перенести в другую группу: её страница тоже меняется.
+    Заодно запоминается картинка, чтобы не создавать миниатюры заново."""
+    instance._previous_group_id = instance._previous_image = None
+    if instance.pk is not None and not raw:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def queue_new_image(sender, instance, raw=False, **kwargs):
+    """Миниатюры для новой картинки, откуда бы ни пришёл пост: из формы,
+    админки или shell. Пачки bulk_create догоняет generate_thumbnails."""
+    if not raw and instance.image.name != instance._previous_image:
+        queue_thumbnails(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, **kwargs):
+    bump_versions(
+        POST_STREAM,
+        ('post', instance.pk),
+        ('author', instance.author_id),
+        ('group', instance.group_id),
+        ('group', getattr(instance, '_previous_group_id', None)),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_versions(sender, instance, **kwargs):
+    bump_versions(('post', instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_versions(sender, instance, **kwargs):
+    bump_versions(('author', instance.author_id), ('author', instance.user_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_versions(sender, instance, **kwargs):
+    bump_versions(('group', instance.pk), ('group_card', instance.pk))
+
+
+@receiver(post_save, sender=User)
+def bump_user_versions(sender, instance, update_fields=None, **kwargs):
+    bump_versions(('author', instance.pk))
+    # Cards show the author's name; a login only updates last_login.
+    if update_fields is None or CARD_USER_FIELDS & set(update_fields):
+        bump_versions(('author_card', instance.pk))
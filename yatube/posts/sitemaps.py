@@ -0,0 +1,200 @@
+"""Карта сайта: индекс и части по SITEMAP_SHARD_SIZE адресов.
+
+Часть — диапазон id одного раздела (посты, группы, профили), поэтому
+её строки выбираются по первичному ключу без OFFSET и без подсчёта
+строк. XML отдаётся потоком: строки читаются iterator() пачками,
+ни одна часть не загружается в память целиком. Команда build_sitemaps
+раскладывает те же части по gzip-файлам для отдачи веб-сервером.
+"""
+import gzip
+import os
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+from posts.models import Group, Post, User
+
+CHUNK_SIZE = 2000
+URL_MARKER = 987654321
+# Characters reverse() leaves unquoted in a path segment.
+SAFE_CHARS = RFC3986_SUBDELIMS + '~:@'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+INDEX_NAME = 'sitemap.xml'
+
+
+def _url_pattern(viewname):
+    """reverse() один раз на раздел, а не на каждый адрес."""
+    return reverse(viewname, args=(URL_MARKER,)).replace(
+        str(URL_MARKER), '{}'
+    )
+
+
+class Section(ABC):
+    viewname = None
+
+    @abstractmethod
+    def queryset(self):
+        """Объекты раздела, части режутся по их id."""
+
+    @abstractmethod
+    def rows(self, queryset):
+        """Значение для адреса и дата изменения (или None)."""
+
+    def urls(self, start, stop):
+        """Адреса части; значения кодируются так же, как в reverse(),
+        иначе имя пользователя кириллицей даст невалидный адрес."""
+        pattern = _url_pattern(self.viewname)
+        rows = self.rows(
+            self.queryset().filter(id__gt=start, id__lte=stop).order_by('id')
+        )
+        for value, lastmod in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield pattern.format(quote(str(value), safe=SAFE_CHARS)), lastmod
+
+
+class PostSection(Section):
+    viewname = 'posts:post_detail'
+
+    def queryset(self):
+        return Post.objects.all()
+
+    def rows(self, queryset):
+        return queryset.values_list('id', 'updated')
+
+
+class GroupSection(Section):
+    viewname = 'posts:group_list'
+
+    def queryset(self):
+        return Group.objects.all()
+
+    def rows(self, queryset):
+        return queryset.values_list('slug').annotate(
+            lastmod=Max('posts__pub_date')
+        )
+
+
+class ProfileSection(Section):
+    viewname = 'posts:profile'
+
+    def queryset(self):
+        """Только авторы: профиль без постов поисковику не нужен."""
+        return User.objects.filter(profile__posts_count__gt=0)
+
+    def rows(self, queryset):
+        return queryset.values_list('username').annotate(
+            lastmod=Max('posts__pub_date')
+        )
+
+
+SECTIONS = {
+    'posts': PostSection(),
+    'groups': GroupSection(),
+    'profiles': ProfileSection(),
+}
+
+
+def _bounds(shard):
+    size = settings.SITEMAP_SHARD_SIZE
+    return (shard - 1) * size, shard * size
+
+
+def shards():
+    """Непустые части (раздел, номер); по запросу на часть, по индексу."""
+    for name, section in SECTIONS.items():
+        last = section.queryset().aggregate(last=Max('id'))['last']
+        for shard in range(1, (last or 0) // settings.SITEMAP_SHARD_SIZE + 2):
+            start, stop = _bounds(shard)
+            if section.queryset().filter(id__gt=start, id__lte=stop).exists():
+                yield name, shard
+
+
+def shard_filename(name, shard):
+    return f'sitemap-{name}-{shard}.xml.gz'
+
+
+def index_xml(locations):
+    yield XML_HEADER
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    for location in locations:
+        yield f'<sitemap><loc>{escape(location)}</loc></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def shard_xml(name, shard, base_url):
+    yield XML_HEADER
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    for path, lastmod in SECTIONS[name].urls(*_bounds(shard)):
+        entry = f'<url><loc>{escape(base_url + path)}</loc>'
+        if lastmod is not None:
+            entry += f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        yield entry + '</url>\n'
+    yield '</urlset>\n'
+
+
+def _xml_response(chunks):
+    return StreamingHttpResponse(
+        chunks, content_type='application/xml; charset=utf-8'
+    )
+
+
+def sitemap_index(request):
+    base_url = request.build_absolute_uri('/')[:-1]
+    return _xml_response(index_xml(
+        base_url + reverse('posts:sitemap_shard', args=(name, shard))
+        for name, shard in shards()
+    ))
+
+
+def sitemap_shard(request, section, shard):
+    if section not in SECTIONS or shard < 1:
+        raise Http404(section)
+    return _xml_response(
+        shard_xml(section, shard, request.build_absolute_uri('/')[:-1])
+    )
+
+
+def _write(path, chunks, compress):
+    temp_path = f'{path}.tmp'
+    opener = gzip.open if compress else open
+    with opener(temp_path, 'wt', encoding='utf-8') as file:
+        file.writelines(chunks)
+    os.replace(temp_path, path)
+
+
+def build(directory, base_url, files_url, progress=None):
+    """Пишет части в directory как .xml.gz и индекс sitemap.xml.
+
+    Индекс заменяется последним, так что поисковик не увидит ссылок
+    на ещё не записанные части; части прошлой сборки, которых больше
+    нет, удаляются после него. Возвращает число частей.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for name, shard in shards():
+        filename = shard_filename(name, shard)
+        _write(
+            os.path.join(directory, filename),
+            shard_xml(name, shard, base_url), compress=True,
+        )
+        written.append(filename)
+        if progress:
+            progress(filename)
+    _write(
+        os.path.join(directory, INDEX_NAME),
+        index_xml(base_url + files_url + filename for filename in written),
+        compress=False,
+    )
+    for filename in os.listdir(directory):
+        if (
+            filename.startswith('sitemap-') and filename.endswith('.xml.gz')
+            and filename not in written
+        ):
+            os.remove(os.path.join(directory, filename))
+    return len(written)
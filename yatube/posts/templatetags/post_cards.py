@@ -0,0 +1,63 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts.cache import ALL_VERSIONS, cache_stats, object_versions
+
+CARD_TEMPLATE = 'posts/includes/post.html'
+
+register = template.Library()
+
+
+def post_card_key(post, in_group, versions):
+    """Ключ карточки меняется вместе с постом, а также с автором
+    и группой: в карточке есть имя автора и название группы. Версии
+    author_card и group_card увеличивает только сохранение самих
+    пользователя и группы, новый пост или подписка карточки не сбрасывают.
+    """
+    return 'post_card:{}:{}:{:d}:{}:{}:{}'.format(
+        post.pk, int(post.updated.timestamp() * 10 ** 6), in_group,
+        versions[ALL_VERSIONS], versions[('author_card', post.author_id)],
+        versions.get(('group_card', post.group_id)),
+    )
+
+
+def card_versions(posts):
+    """Версии авторов и групп постов страницы одним обращением к кэшу."""
+    objects = list(dict.fromkeys(
+        obj for post in posts
+        for obj in (
+            ('author_card', post.author_id), ('group_card', post.group_id)
+        )
+        if obj[1] is not None
+    ))
+    return dict(zip((ALL_VERSIONS, *objects), object_versions(*objects)))
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, in_group=False):
+    """Карточки постов; на странице группы (in_group) без ссылки
+    на группу."""
+    request = context.get('request')
+    posts = list(posts)
+    versions = card_versions(posts)
+    posts = {
+        post_card_key(post, in_group, versions): post for post in posts
+    }
+    cards = cache.get_many(list(posts))
+    cache_stats.record(
+        'post_card', hits=len(cards), misses=len(posts) - len(cards)
+    )
+    rendered = {}
+    card_template = get_template(CARD_TEMPLATE)
+    for key, post in posts.items():
+        if key not in cards:
+            rendered[key] = card_template.render(
+                {'post': post, 'request': request, 'in_group': in_group}
+            )
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in posts]
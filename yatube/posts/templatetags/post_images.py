@@ -0,0 +1,35 @@
+from django import template
+from django.conf import settings
+from sorl.thumbnail import default
+
+from posts.thumbnails import MIME_TYPES, backend, output_formats
+
+register = template.Library()
+
+
+def _srcset(entries):
+    return ', '.join(
+        '%s %sw' % (default.storage.url(name), width)
+        for width, name in sorted(entries)
+    )
+
+
+@register.simple_tag
+def ready_picture(image, alias):
+    """Данные для <picture>, если миниатюры картинки уже созданы."""
+    if not image:
+        return None
+    pictures = backend.get_picture(image, alias)
+    *modern, fallback = output_formats()
+    if not pictures or fallback not in pictures:
+        return None
+    width, name = max(pictures[fallback])
+    return {
+        'src': default.storage.url(name),
+        'srcset': _srcset(pictures[fallback]),
+        'sizes': settings.THUMBNAIL_SIZES,
+        'sources': [
+            {'type': MIME_TYPES[format_], 'srcset': _srcset(pictures[format_])}
+            for format_ in modern if format_ in pictures
+        ],
+    }
@@ -0,0 +1,77 @@
+import re
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.urls import COMMENT_LIST, POST_DETAIL
+from posts.views import COMMENTS_ON_PAGE
+
+AMOUNT_TEST_COMMENTS = COMMENTS_ON_PAGE + 5
+
+
+def comment_texts(content):
+    return re.findall(r'Комментарий №(\d+)', content.decode())
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post, author=cls.author,
+                text=f'Комментарий №{number}',
+            )
+            for number in range(AMOUNT_TEST_COMMENTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse(POST_DETAIL, kwargs={'post_id': self.post.id})
+
+    def expected(self):
+        return [
+            text.split('№')[1] for text in Comment.objects.filter(
+                post=self.post
+            ).order_by('-created', '-id').values_list('text', flat=True)
+        ]
+
+    def test_comments_load_page_by_page(self):
+        """Пост показывает первую страницу комментариев, остальные
+        подгружаются фрагментом по курсору"""
+        response = self.client.get(self.url)
+        first = comment_texts(response.content)
+        self.assertEqual(first, self.expected()[:COMMENTS_ON_PAGE])
+        more = re.search(
+            r'href="([^"]+)"\s*>\s*Показать ещё', response.content.decode()
+        ).group(1)
+        self.assertTrue(more.startswith(
+            reverse(COMMENT_LIST, kwargs={'post_id': self.post.id})
+        ))
+        with self.assertNumQueries(2):
+            response = self.client.get(more.replace('&amp;', '&'))
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            first + comment_texts(response.content), self.expected()
+        )
+        self.assertNotIn('Показать ещё', response.content.decode())
+
+    def test_first_page_is_cached_until_new_comment(self):
+        """Первая страница комментариев берётся из кэша, пока
+        к посту не добавят комментарий"""
+        self.client.get(self.url)
+        client = Client()
+        client.force_login(self.author)
+        with self.assertNumQueries(4):
+            client.get(self.url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий №100'
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(comment_texts(response.content)[0], '100')
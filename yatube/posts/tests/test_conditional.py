@@ -0,0 +1,139 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import recount_all
+from posts.models import Comment, Follow, Group, Post, User
+from posts.thumbnails import backend, thumbnails_ready
+from posts.urls import GROUP_LIST, POST_DETAIL, PROFILE
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, client=None):
+        """Код ответа на повторный запрос с ETag первого ответа."""
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        return lambda: client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_page_is_not_rendered(self):
+        """Неизменившаяся страница отдаётся как 304 без шаблона,
+        с заголовками для обратного прокси и без Last-Modified"""
+        url = reverse(POST_DETAIL, kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        self.assertNotIn('Last-Modified', response)
+        with self.assertTemplateNotUsed('posts/post_detail.html'):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertIn('s-maxage', response['Cache-Control'])
+
+    def test_changes_invalidate_pages(self):
+        """Комментарий, подписка и перенос поста в другую группу
+        меняют ETag зависящих от них страниц"""
+        post_page = self.revalidate(
+            reverse(POST_DETAIL, kwargs={'post_id': self.post.id})
+        )
+        profile_page = self.revalidate(
+            reverse(PROFILE, kwargs={'username': self.author.username})
+        )
+        group_page = self.revalidate(
+            reverse(GROUP_LIST, kwargs={'slug': self.group.slug})
+        )
+        other_page = self.revalidate(
+            reverse(GROUP_LIST, kwargs={'slug': self.other_group.slug})
+        )
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertEqual(post_page(), HTTPStatus.OK)
+        self.assertEqual(profile_page(), HTTPStatus.NOT_MODIFIED)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(profile_page(), HTTPStatus.OK)
+        self.assertEqual(group_page(), HTTPStatus.NOT_MODIFIED)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertEqual(group_page(), HTTPStatus.OK)
+        self.assertEqual(other_page(), HTTPStatus.OK)
+
+    def test_bulk_changes_and_viewer_change_etag(self):
+        """ETag зависит от посетителя и меняется после пересчёта
+        счётчиков; личные страницы прокси не хранит"""
+        url = reverse(PROFILE, kwargs={'username': self.author.username})
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], self.client.get(url)['ETag'])
+        page = self.revalidate(url)
+        recount_all()
+        self.assertEqual(page(), HTTPStatus.OK)
+
+    def test_ready_thumbnails_change_etag(self):
+        """Готовые миниатюры меняют ETag страниц поста с картинкой"""
+        Post.objects.filter(pk=self.post.pk).update(image='posts/test.gif')
+        pages = {
+            name: self.revalidate(reverse(name, kwargs=kwargs))
+            for name, kwargs in (
+                (POST_DETAIL, {'post_id': self.post.id}),
+                (PROFILE, {'username': self.author.username}),
+                (GROUP_LIST, {'slug': self.group.slug}),
+            )
+        }
+        with mock.patch.object(backend, 'register_thumbnails'):
+            thumbnails_ready('posts/test.gif', (1, 1), [])
+        for name, page in pages.items():
+            with self.subTest(page=name):
+                self.assertEqual(page(), HTTPStatus.OK)
+
+    def test_edits_are_not_hidden_by_if_modified_since(self):
+        """На If-Modified-Since страницы не отвечают 304: дата
+        последнего поста не меняется при правке и подписке"""
+        since = 'Sat, 01 Jan 2100 00:00:00 GMT'
+        urls = (
+            reverse(POST_DETAIL, kwargs={'post_id': self.post.id}),
+            reverse(PROFILE, kwargs={'username': self.author.username}),
+            reverse(GROUP_LIST, kwargs={'slug': self.group.slug}),
+            reverse('posts:posts_rss'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotIn('Last-Modified', response)
+
+    def test_missing_object_is_not_found(self):
+        """Для несуществующего объекта валидаторов нет, ответ 404"""
+        response = self.client.get(
+            reverse(GROUP_LIST, kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+AMOUNT_TEST_POSTS = 5
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(SYNDICATION_ITEMS=3)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='TestAuthor', first_name='Тест', last_name='Автор'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(AMOUNT_TEST_POSTS):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост №{number}',
+                group=cls.group if number % 2 else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_latest_posts(self):
+        """Ленты RSS и Atom отдают последние посты потока, группы
+        и автора"""
+        latest = list(Post.objects.order_by('-pub_date', '-id'))
+        feeds = {
+            reverse('posts:posts_rss'): latest[:3],
+            reverse('posts:group_rss', args=(self.group.slug,)): [
+                post for post in latest if post.group_id
+            ][:3],
+            reverse('posts:profile_rss', args=(self.author.username,)):
+                latest[:3],
+        }
+        for url, posts in feeds.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/rss+xml; charset=utf-8',
+                )
+                links = [
+                    link.text for link in
+                    ElementTree.fromstring(response.content).iter('link')
+                ][1:]
+                self.assertEqual(links, [
+                    f'http://testserver/posts/{post.id}/' for post in posts
+                ])
+        response = self.client.get(
+            reverse('posts:profile_atom', args=(self.author.username,))
+        )
+        entry = ElementTree.fromstring(response.content).find(f'{ATOM}entry')
+        self.assertEqual(
+            entry.find(f'{ATOM}author/{ATOM}name').text, 'Тест Автор'
+        )
+
+    def test_polling_is_cached_until_post_changes(self):
+        """Повторный опрос ленты без изменений — один запрос к базе
+        или 304; новый пост сразу попадает в ленту"""
+        url = reverse('posts:group_atom', args=(self.group.slug,))
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Новый пост', response.content.decode())
+        response = self.client.get(reverse('posts:posts_rss'))
+        self.assertIn('Новый пост', response.content.decode())
+
+    def test_missing_group_feed(self):
+        """Лента несуществующей группы отвечает 404"""
+        response = self.client.get(reverse('posts:group_rss', args=('nope',)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -1,11 +1,15 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
+from django.contrib import admin
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.shortcuts import get_object_or_404
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
+from posts.admin import PostAdmin
 from posts.forms import CommentForm, PostForm
 from posts.models import Comment, Group, Post, User
 from posts.urls import (ADD_COMMENT, POST_CREATE, POST_DETAIL, POST_EDITE,
@@ -171,6 +175,35 @@ class PostCreateFormTests(TestCase):
             'Поле "image" не отредактировалось'
         )
 
+    def test_edit_keeps_counters(self):
+        """Правка поста не затирает комментарий, посчитанный, пока
+        шёл запрос, а в форме админки счётчика нет"""
+        post_id = PostCreateFormTests.post.id
+
+        def fetch_then_comment(*args, **kwargs):
+            post = get_object_or_404(*args, **kwargs)
+            Comment.objects.create(
+                post=post, author=PostCreateFormTests.user, text='Комментарий'
+            )
+            return post
+
+        with mock.patch(
+            'posts.views.get_object_or_404', side_effect=fetch_then_comment
+        ):
+            PostCreateFormTests.author_client.post(
+                reverse(POST_EDITE, kwargs={'post_id': post_id}),
+                data={'text': 'Отредактированный тестовый текст'},
+            )
+        post = Post.objects.get(id=post_id)
+        self.assertEqual(post.text, 'Отредактированный тестовый текст')
+        self.assertEqual(post.comments_count, 1)
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        form = PostAdmin(Post, admin.site).get_form(request, post)
+        self.assertNotIn('comments_count', form.base_fields)
+
 
 class CommentFormTests(TestCase):
     @classmethod
@@ -1,6 +1,10 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import DISPLAYED_LETTERS, Group, Post, User
+from posts.models import (DISPLAYED_LETTERS, Comment, Follow, Group, Post,
+                          Profile, User)
 
 
 class PostModelTest(TestCase):
@@ -35,3 +39,47 @@ class PostModelTest(TestCase):
         self.assertEqual(
             str(group), title, '__str__ модели Group работает некорректно'
         )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+
+    def test_counters_follow_changes(self):
+        """Счётчики постов, подписок и комментариев
+        меняются вместе с данными"""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.create(author=self.author, text='Ещё текст')
+        Follow.objects.create(user=self.user, author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        author_profile = Profile.objects.get(user=self.author)
+        user_profile = Profile.objects.get(user=self.user)
+        post.refresh_from_db()
+        self.assertEqual(author_profile.posts_count, 2)
+        self.assertEqual(author_profile.followers_count, 1)
+        self.assertEqual(user_profile.following_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        post.delete()
+        Follow.objects.all().delete()
+        author_profile.refresh_from_db()
+        user_profile.refresh_from_db()
+        self.assertEqual(author_profile.posts_count, 1)
+        self.assertEqual(author_profile.followers_count, 0)
+        self.assertEqual(user_profile.following_count, 0)
+
+    def test_recount_counters_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения
+        и создаёт недостающие профили"""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        Profile.objects.filter(user=self.author).update(posts_count=7)
+        Profile.objects.filter(user=self.user).delete()
+        Post.objects.update(comments_count=0)
+        call_command('recount_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(Profile.objects.get(user=self.author).posts_count, 1)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.paginator import CursorPaginator
+from posts.urls import GROUP_LIST, INDEX, PROFILE
+from posts.views import POSTS_ON_PAGE
+
+AMOUNT_TEST_POSTS = 25
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.user,
+                text=f'Тестовый текст №{count_test_post}',
+                group=cls.group,
+            )
+            for count_test_post in range(AMOUNT_TEST_POSTS)
+        )
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cursor_walks_forward_and_back(self):
+        """Курсоры вперёд и назад обходят ленту без пропусков
+        и повторов даже при одинаковой дате публикации"""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        walked = [post for page in pages for post in page]
+        self.assertEqual(walked, self.expected)
+        self.assertFalse(pages[0].has_previous())
+        back = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[-2]))
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу"""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        cursors = (
+            'мусор', 'bm90LWpzb24', 'WyJuZXh0IiwgWzFdXQ',
+            'WyJuZXh0IiwgW1sieCJdLCAxXV0',
+        )
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(
+                    list(page), self.expected[:POSTS_ON_PAGE]
+                )
+
+    def test_views_use_cursor_and_page_number(self):
+        """Ленты листаются по курсору, а старые ссылки
+        с номером страницы продолжают работать"""
+        pages_names = (
+            reverse(INDEX),
+            reverse(GROUP_LIST, kwargs={'slug': self.group.slug}),
+            reverse(PROFILE, kwargs={'username': self.user.username}),
+        )
+        for reverse_name in pages_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.client.get(reverse_name)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POSTS_ON_PAGE)
+                self.assertContains(response, page_obj.next_cursor)
+                response = self.client.get(
+                    reverse_name, {'cursor': page_obj.next_cursor}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    self.expected[POSTS_ON_PAGE:POSTS_ON_PAGE * 2]
+                )
+                response = self.client.get(reverse_name, {'page': 3})
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    self.expected[POSTS_ON_PAGE * 2:]
+                )
@@ -0,0 +1,184 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import recount_all
+from posts.models import Comment, Follow, Group, Post, User
+from posts.urls import (ADD_COMMENT, FOLLOW_INDEX, GROUP_LIST, INDEX,
+                        POST_CREATE, POST_DETAIL, POST_EDITE, PROFILE,
+                        PROFILE_FOLLOW, PROFILE_UNFOLLOW, SEARCH)
+from posts.views import POSTS_ON_PAGE
+
+AMOUNT_AUTHORS = 5
+POSTS_PER_AUTHOR = 40
+AMOUNT_COMMENTS = 25
+FOLLOWED_AUTHORS = 3
+PAGE_ROWS = POSTS_ON_PAGE + 1
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов и прочитанных строк для каждой страницы.
+
+    Бюджеты точные: лишний запрос или выборка всех постов группы
+    ради одной страницы сразу видны в упавшем тесте.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description='Тестовое описание',
+            )
+            for number in range(2)
+        ]
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(AMOUNT_AUTHORS)
+        ]
+        Post.objects.bulk_create(
+            Post(
+                author=author,
+                group=cls.groups[number % 2] if number % 3 else None,
+                text=f'Пост номер {number} автора {author.username}',
+            )
+            for author in cls.authors
+            for number in range(POSTS_PER_AUTHOR)
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Комментарий {n}')
+            for n in range(AMOUNT_COMMENTS)
+        )
+        for author in cls.authors[:FOLLOWED_AUTHORS]:
+            Follow.objects.create(user=cls.reader, author=author)
+        recount_all()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def assertBudget(self, request, queries, max_rows):
+        """Запрос страницы укладывается в число запросов и строк.
+
+        Строки выборки считаются перед её выполнением отдельным
+        курсором, который не попадает в число запросов.
+        """
+        rows = 0
+
+        def count_rows(execute, sql, params, many, context):
+            nonlocal rows
+            if sql.lstrip().upper().startswith('SELECT'):
+                cursor = context['connection'].connection.cursor(
+                    factory=SQLiteCursorWrapper
+                )
+                cursor.execute(f'SELECT COUNT(*) FROM ({sql})', params)
+                rows += cursor.fetchone()[0]
+                cursor.close()
+            return execute(sql, params, many, context)
+
+        with self.assertNumQueries(queries):
+            with connection.execute_wrapper(count_rows):
+                response = request()
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(rows, max_rows)
+        return response
+
+    def test_feed_pages(self):
+        """Ленты читают одну страницу постов вместе с авторами и группами;
+        страницы группы и профиля ещё одним запросом берут валидаторы
+        для условного GET"""
+        author = self.authors[0]
+        pages = (
+            ('index', self.client, reverse(INDEX), {}, 1, PAGE_ROWS),
+            (
+                'index page 3', self.client, reverse(INDEX), {'page': 3},
+                2, PAGE_ROWS + 1,
+            ),
+            (
+                'group', self.client,
+                reverse(GROUP_LIST, kwargs={'slug': self.groups[0].slug}),
+                {}, 3, PAGE_ROWS + 2,
+            ),
+            (
+                'profile', self.client,
+                reverse(PROFILE, kwargs={'username': author.username}),
+                {}, 3, PAGE_ROWS + 2,
+            ),
+            (
+                'profile of followed', self.reader_client,
+                reverse(PROFILE, kwargs={'username': author.username}),
+                {}, 6, PAGE_ROWS + 5,
+            ),
+            (
+                'follow', self.reader_client, reverse(FOLLOW_INDEX),
+                {}, 4, PAGE_ROWS + 2,
+            ),
+            (
+                'search', self.client, reverse(SEARCH), {'q': 'автора'},
+                1, PAGE_ROWS,
+            ),
+        )
+        for name, client, url, data, queries, max_rows in pages:
+            cache.clear()
+            with self.subTest(page=name):
+                self.assertBudget(
+                    lambda: client.get(url, data), queries, max_rows
+                )
+
+    def test_post_detail(self):
+        """Пост, его автор с профилем и группой и комментарии
+        с авторами читаются двумя запросами, валидаторы — третьим"""
+        url = reverse(POST_DETAIL, kwargs={'post_id': self.post.id})
+        self.assertBudget(
+            lambda: self.client.get(url), 3, 2 + AMOUNT_COMMENTS
+        )
+
+    def test_post_forms(self):
+        """Формы создания и редактирования поста не читают лишнего"""
+        groups = len(self.groups)
+        self.assertBudget(
+            lambda: self.author_client.get(reverse(POST_CREATE)),
+            3, 2 + groups,
+        )
+        self.assertBudget(
+            lambda: self.author_client.get(
+                reverse(POST_EDITE, kwargs={'post_id': self.post.id})
+            ),
+            4, 3 + groups,
+        )
+
+    def test_follow_and_comment_actions(self):
+        """Подписка читает только id и даты постов автора для ленты
+        (и, с холодным кэшем, список популярных авторов), отписка
+        и комментарий постов не читают"""
+        author = self.authors[-1]
+        self.assertBudget(
+            lambda: self.reader_client.get(
+                reverse(PROFILE_FOLLOW, kwargs={'username': author.username})
+            ),
+            10, 3 + POSTS_PER_AUTHOR,
+        )
+        self.assertBudget(
+            lambda: self.reader_client.get(
+                reverse(
+                    PROFILE_UNFOLLOW, kwargs={'username': author.username}
+                )
+            ),
+            8, 4,
+        )
+        self.assertBudget(
+            lambda: self.reader_client.post(
+                reverse(ADD_COMMENT, kwargs={'post_id': self.post.id}),
+                {'text': 'Новый комментарий'},
+            ),
+            5, 3,
+        )
@@ -0,0 +1,161 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginator import COMMENT_ORDERING, NEXT, CursorPaginator
+from posts.search import SEARCH_ORDERING, search_posts
+from posts.urls import (COMMENT_LIST, FOLLOW_INDEX, GROUP_LIST, INDEX,
+                        POST_DETAIL, PROFILE, SEARCH)
+
+AMOUNT_TEST_POSTS = 15
+
+
+def plan_problems(plan, cursor=False):
+    """Полные просмотры таблиц и сортировки, не покрытые индексом.
+
+    Страница по курсору не должна обходить индекс (SCAN ... USING
+    INDEX): она ищет диапазон (SEARCH), иначе чем глубже страница,
+    тем она медленнее. Выдачу полнотекстового поиска сортировать
+    приходится всегда: оценка BM25 вычисляется для найденных строк
+    и в индексе не лежит.
+    """
+    full_text = any('VIRTUAL TABLE' in detail for detail in plan)
+    problems = []
+    for detail in plan:
+        if 'VIRTUAL TABLE' in detail:
+            continue
+        if detail.startswith('SCAN ') and (
+            cursor or ' USING ' not in detail
+        ):
+            problems.append(detail)
+        elif 'TEMP B-TREE' in detail and not full_text:
+            problems.append(detail)
+    return problems
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestReader')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.author,
+                text=f'Тестовый пост №{number}',
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(AMOUNT_TEST_POSTS)
+        )
+        cls.post = Post.objects.first()
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def capture_queries(self, url, data=None):
+        queries = []
+
+        def collect(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            response = self.reader_client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def cursor(self, queryset, ordering, obj):
+        return CursorPaginator(queryset, 1, ordering).encode_cursor(
+            NEXT, obj
+        )
+
+    def test_feed_queries_do_not_scan_and_sort(self):
+        """Запросы страниц не читают таблицу целиком и не сортируют
+        строки сами: для каждого фильтра и порядка есть индекс,
+        а страницы по курсору ищут диапазон"""
+        post_cursor = {'cursor': self.cursor(
+            Post.objects.all(), ('-pub_date', '-id'),
+            Post.objects.order_by('pub_date', 'id').first(),
+        )}
+        comment_cursor = {'cursor': self.cursor(
+            Comment.objects.all(), COMMENT_ORDERING,
+            Comment.objects.order_by('created', 'id').first(),
+        )}
+        found = search_posts('пост')
+        search_cursor = {'q': 'пост', 'cursor': self.cursor(
+            found, SEARCH_ORDERING, found.order_by(*SEARCH_ORDERING)[1],
+        )}
+        group_url = reverse(GROUP_LIST, kwargs={'slug': self.group.slug})
+        profile_url = reverse(PROFILE, kwargs={'username': self.author})
+        pages = (
+            (reverse(INDEX), None),
+            (reverse(INDEX), post_cursor),
+            (reverse(INDEX), {'page': 2}),
+            (group_url, None),
+            (group_url, post_cursor),
+            (profile_url, None),
+            (profile_url, post_cursor),
+            (reverse(POST_DETAIL, kwargs={'post_id': self.post.id}), None),
+            (
+                reverse(COMMENT_LIST, kwargs={'post_id': self.post.id}),
+                comment_cursor,
+            ),
+            (reverse(FOLLOW_INDEX), None),
+            (reverse(FOLLOW_INDEX), post_cursor),
+            (reverse(SEARCH), {'q': 'пост'}),
+            (reverse(SEARCH), search_cursor),
+        )
+        for url, data in pages:
+            cache.clear()
+            response, queries = self.capture_queries(url, data)
+            cursor = bool(data and 'cursor' in data)
+            for sql, params in queries:
+                plan = self.explain(sql, params)
+                with self.subTest(url=url, data=data, sql=sql):
+                    self.assertEqual(plan_problems(plan, cursor), [], plan)
+
+    def test_deep_cursor_seeks_by_range(self):
+        """Страница по курсору ищет строки диапазоном индекса, а не
+        обходит его от самых новых постов: её цена не зависит
+        от глубины"""
+        oldest = Post.objects.order_by('pub_date', 'id').first()
+        cursor = CursorPaginator(Post.objects.all(), 1).encode_cursor(
+            NEXT, oldest
+        )
+        pages = (
+            reverse(INDEX),
+            reverse(GROUP_LIST, kwargs={'slug': self.group.slug}),
+            reverse(PROFILE, kwargs={'username': self.author}),
+            reverse(FOLLOW_INDEX),
+        )
+        for url in pages:
+            cache.clear()
+            _, queries = self.capture_queries(url, {'cursor': cursor})
+            plans = [
+                self.explain(sql, params) for sql, params in queries
+                if '"pub_date" <' in sql
+            ]
+            with self.subTest(url=url):
+                self.assertTrue(plans)
+                for plan in plans:
+                    self.assertRegex(plan[0], r'^SEARCH .*\bpub_date<\?')
@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.search import search_posts
+from posts.urls import SEARCH
+from posts.views import POSTS_ON_PAGE
+
+AMOUNT_TEST_POSTS = 15
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor')
+        cls.admin = User.objects.create_superuser(
+            username='TestAdmin', email='admin@example.com', password='pass'
+        )
+        cls.post_about_cats = Post.objects.create(
+            author=cls.user,
+            text='Коты спят весь день',
+        )
+        cls.post_with_comment = Post.objects.create(
+            author=cls.user,
+            text='Фотографии с прогулки',
+        )
+        Comment.objects.create(
+            post=cls.post_with_comment,
+            author=cls.user,
+            text='Там на фото кот!',
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text='Про собак',
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_search_by_post_and_comment_text(self):
+        """Поиск находит посты по тексту и по комментариям,
+        совпадение в тексте поста выше совпадения в комментарии"""
+        found = list(search_posts('кот'))
+        self.assertEqual(
+            found, [self.post_about_cats, self.post_with_comment]
+        )
+        self.assertEqual(list(search_posts('собака')), [])
+        self.assertEqual(list(search_posts('собак')), [self.other_post])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении постов
+        и комментариев"""
+        post = Post.objects.get(pk=self.other_post.pk)
+        post.text = 'Про енотов'
+        post.save()
+        self.assertEqual(list(search_posts('собак')), [])
+        self.assertEqual(list(search_posts('енот')), [post])
+        Comment.objects.filter(post=self.post_with_comment).delete()
+        self.assertEqual(list(search_posts('кот')), [self.post_about_cats])
+        Post.objects.filter(pk=self.post_about_cats.pk).delete()
+        self.assertEqual(list(search_posts('кот')), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы и спецсимволы FTS5 в запросе не ломают поиск"""
+        for query in ('"кот', 'кот AND', 'NEAR(кот', '*', 'кот -собак'):
+            with self.subTest(query=query):
+                response = self.client.get(reverse(SEARCH), {'q': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_search_page_is_keyset_paginated(self):
+        """Страница поиска делится курсорами, запрос сохраняется
+        в ссылках на следующую страницу"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Ещё один кот №{number}')
+            for number in range(AMOUNT_TEST_POSTS)
+        )
+        response = self.client.get(reverse(SEARCH), {'q': 'кот'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_ON_PAGE)
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+        response = self.client.get(
+            reverse(SEARCH), {'q': 'кот', 'cursor': page_obj.next_cursor}
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(
+            len(page_obj) + len(second_page), AMOUNT_TEST_POSTS + 2
+        )
+        self.assertFalse(set(page_obj) & set(second_page))
+
+    def test_rebuild_search_index(self):
+        """Команда rebuild_search_index заново индексирует посты"""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        self.assertEqual(list(search_posts('кот')), [])
+        call_command('rebuild_search_index', batch_size=2)
+        self.assertEqual(
+            list(search_posts('кот')),
+            [self.post_about_cats, self.post_with_comment],
+        )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу"""
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.post_about_cats, self.post_with_comment},
+        )
@@ -0,0 +1,112 @@
+import gzip
+import os
+import re
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+AMOUNT_TEST_POSTS = 7
+
+
+def locations(content):
+    return re.findall(r'<loc>([^<]+)</loc>', content)
+
+
+@override_settings(SITEMAP_SHARD_SIZE=3)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Тестовый пост №{number}')
+            for number in range(AMOUNT_TEST_POSTS)
+        )
+        cls.author.profile.posts_count = AMOUNT_TEST_POSTS
+        cls.author.profile.save()
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, url):
+        response = self.client.get(url)
+        return b''.join(response.streaming_content).decode()
+
+    def test_shards_cover_every_page(self):
+        """Части индекса покрывают все посты, группы и профили
+        авторов, каждая не больше SITEMAP_SHARD_SIZE адресов"""
+        shards = locations(self.get(reverse('posts:sitemap_index')))
+        self.assertEqual(len(shards), 3 + 1 + 1)
+        urls = []
+        for shard in shards:
+            with self.subTest(shard=shard):
+                with self.assertNumQueries(1):
+                    shard_urls = locations(self.get(shard))
+                self.assertLessEqual(len(shard_urls), 3)
+                urls.extend(shard_urls)
+        expected = [
+            f'http://testserver/posts/{post_id}/'
+            for post_id in Post.objects.order_by('id')
+            .values_list('id', flat=True)
+        ] + [
+            'http://testserver/group/test-slug/',
+            'http://testserver/profile/TestAuthor/',
+        ]
+        self.assertEqual(urls, expected)
+
+    def test_urls_are_percent_encoded(self):
+        """Имя пользователя кириллицей попадает в карту сайта
+        закодированным, как его отдаёт reverse()"""
+        author = User.objects.create_user(username='Автор')
+        Post.objects.create(author=author, text='Тестовый пост')
+        urls = locations(self.get(
+            reverse('posts:sitemap_shard', args=('profiles', 1))
+        ))
+        url = 'http://testserver' + reverse(
+            'posts:profile', kwargs={'username': author.username}
+        )
+        self.assertTrue(url.isascii())
+        self.assertIn(url, urls)
+
+    def test_unknown_shard(self):
+        """Неизвестный раздел карты сайта отвечает 404"""
+        response = self.client.get(
+            reverse('posts:sitemap_shard', args=('users', 1))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_build_writes_gzip_files(self):
+        """Команда пишет индекс и части в gzip и убирает части,
+        которых больше нет"""
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, 'sitemap-posts-9.xml.gz')
+            open(stale, 'w').close()
+            call_command(
+                'build_sitemaps', '--output', directory,
+                '--base-url', 'https://example.com/', stdout=StringIO(),
+            )
+            self.assertFalse(os.path.exists(stale))
+            with open(os.path.join(directory, 'sitemap.xml')) as file:
+                shards = locations(file.read())
+            self.assertEqual(
+                shards[0],
+                'https://example.com/sitemaps/sitemap-posts-1.xml.gz',
+            )
+            with gzip.open(
+                os.path.join(directory, os.path.basename(shards[-1])), 'rt'
+            ) as file:
+                self.assertEqual(
+                    locations(file.read()),
+                    ['https://example.com/profile/TestAuthor/'],
+                )
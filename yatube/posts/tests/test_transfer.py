@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.transfer import export_rows, write_checkpoint
+
+AMOUNT_TEST_POSTS = 7
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(AMOUNT_TEST_POSTS):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост №{number}',
+                group=cls.group if number % 2 else None,
+            )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Тестовый комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'dump.ndjson')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def snapshot(self):
+        return {
+            'groups': list(Group.objects.values_list('id', 'slug')),
+            'posts': list(Post.objects.values_list(
+                'id', 'text', 'pub_date', 'updated', 'author__username',
+                'group_id',
+            )),
+            'comments': list(Comment.objects.values_list(
+                'id', 'post_id', 'author__username', 'text', 'created',
+            )),
+            'follows': list(Follow.objects.values_list(
+                'user__username', 'author__username',
+            )),
+        }
+
+    def export(self, *args):
+        call_command('export_posts', self.path, *args, stdout=StringIO())
+
+    def test_export_and_import_round_trip(self):
+        """Загрузка выгрузки в пустую базу восстанавливает записи
+        с датами, а также ленты подписок и счётчики"""
+        expected = self.snapshot()
+        self.export('--chunk-size', '3')
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+        call_command(
+            'import_posts', self.path, '--chunk-size', '3',
+            '--batch-size', '2', stdout=StringIO(),
+        )
+        self.assertEqual(self.snapshot(), expected)
+        author = User.objects.get(username=self.author.username)
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.profile.posts_count, AMOUNT_TEST_POSTS)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='TestReader').count(),
+            AMOUNT_TEST_POSTS,
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+
+    def test_export_resumes_from_checkpoint(self):
+        """Прерванная выгрузка продолжается с контрольной точки
+        и совпадает с выгрузкой без перерыва"""
+        self.export()
+        with open(self.path) as file:
+            complete = file.read()
+
+        class Interrupted(Exception):
+            pass
+
+        def checkpoint(model, last_id, rows):
+            file.flush()
+            write_checkpoint(f'{self.path}.checkpoint', {
+                'model': model, 'last_id': last_id, 'offset': file.tell(),
+            })
+            if model == 'post':
+                raise Interrupted
+
+        with open(self.path, 'wb') as file:
+            with self.assertRaises(Interrupted):
+                export_rows(
+                    lambda line: file.write(line.encode()), 2,
+                    checkpoint=checkpoint,
+                )
+            file.write(b'{"model": "post", "id"')
+        self.export('--resume')
+        with open(self.path) as file:
+            self.assertEqual(file.read(), complete)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Загрузка с контрольной точки пропускает уже сохранённые
+        строки и продолжает с места остановки"""
+        self.export()
+        with open(self.path, 'rb') as file:
+            lines = file.readlines()
+        saved = sum(
+            json.loads(line)['model'] in ('group', 'post') for line in lines
+        )
+        write_checkpoint(f'{self.path}.checkpoint', {
+            'model': 'post', 'offset': sum(map(len, lines[:saved])),
+        })
+        Comment.objects.all().delete()
+        Follow.objects.all().delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Изменённый текст')
+        call_command('import_posts', self.path, '--resume', stdout=StringIO())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).text, 'Изменённый текст'
+        )
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_import_refuses_occupied_ids(self):
+        """Запись с занятым id останавливает загрузку с перечнем id,
+        пачка с ней откатывается целиком"""
+        self.export()
+        with open(self.path, 'rb') as file:
+            lines = [
+                line for line in file
+                if json.loads(line)['model'] == 'comment'
+            ]
+        other = Comment.objects.create(
+            post=self.post, author=self.author, text='Другой комментарий'
+        )
+        Comment.objects.exclude(pk=other.pk).delete()
+        record = json.loads(lines[0])
+        lines.insert(0, json.dumps({**record, 'id': other.pk + 1}).encode())
+        lines.append(json.dumps({**record, 'id': other.pk}).encode())
+        with open(self.path, 'wb') as file:
+            file.write(b'\n'.join(lines) + b'\n')
+        with self.assertRaisesMessage(
+            CommandError, f'comment: в базе уже есть записи с id {other.pk}'
+        ):
+            call_command('import_posts', self.path, stdout=StringIO())
+        self.assertEqual(list(Comment.objects.all()), [other])
+
+    def test_import_refuses_missing_references(self):
+        """Комментарий к несуществующему посту останавливает загрузку
+        с понятной ошибкой"""
+        missing = Post.objects.order_by('-pk').first().pk + 1
+        record = {
+            'model': 'comment', 'id': 1000, 'post': missing,
+            'author': self.reader.username, 'text': 'Комментарий',
+            'created': '2024-01-01T00:00:00+00:00',
+        }
+        with open(self.path, 'w') as file:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        with self.assertRaisesMessage(
+            CommandError, f'comment: нет записей post с id {missing}'
+        ):
+            call_command('import_posts', self.path, stdout=StringIO())
+        self.assertFalse(Comment.objects.filter(pk=1000).exists())
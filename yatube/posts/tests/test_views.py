@@ -1,14 +1,19 @@
 import shutil
 import tempfile
+from io import StringIO
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post, User
+from posts.cache import cache_stats, page_cache_key
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.thumbnails import generate_thumbnails
 from posts.urls import (ADD_COMMENT, FOLLOW_INDEX, GROUP_LIST, INDEX,
                         POST_CREATE, POST_DETAIL, POST_EDITE, PROFILE,
                         PROFILE_FOLLOW, PROFILE_UNFOLLOW)
@@ -321,24 +326,39 @@ class PostViewsTests(TestCase):
             'На странице шаблона index '
             'пост не найден'
         )
-        new_post.delete()
-        response_after_delete = self.client.get(reverse(INDEX))
+        Post.objects.filter(pk=new_post.pk).update(text='Другой текст')
+        response_cached = self.client.get(reverse(INDEX))
         self.assertEqual(
-            response_after_delete.content,
+            response_cached.content,
             response_after_create.content,
-            'На странице шаблона index '
-            'после удаления поста из базы '
-            'пост не найден'
+            'Страница index не взята из кэша'
         )
-        cache.clear()
-        response_after_delete_cache_cleared = self.client.get(reverse(INDEX))
+        new_post.delete()
+        response_after_delete = self.client.get(reverse(INDEX))
         self.assertNotEqual(
-            response_after_delete_cache_cleared.content,
+            response_after_delete.content,
             response_after_create.content,
             'На странице шаблона index '
             'после удаления поста из базы '
-            'и отчистки кэша, пост найден'
+            'пост найден'
+        )
+        self.assertNotIn(new_post, response_after_delete.context['page_obj'])
+
+    def test_cache_index_serves_stale_page_while_rebuilding(self):
+        """Пока один процесс перерисовывает index,
+        остальные получают устаревшую копию"""
+        response_before = self.client.get(reverse(INDEX))
+        Post.objects.create(
+            author=PostViewsTests.user_author,
+            text='Новый тестовый текстик',
         )
+        key = page_cache_key('index_page', reverse(INDEX), None)
+        cache.add(f'{key}:lock', 0)
+        response_stale = self.client.get(reverse(INDEX))
+        self.assertEqual(response_stale.content, response_before.content)
+        cache.delete(f'{key}:lock')
+        response_fresh = self.client.get(reverse(INDEX))
+        self.assertNotEqual(response_fresh.content, response_before.content)
 
     def test_authorized_user_can_follow(self):
         """Авторизованный пользователь может
@@ -417,3 +437,146 @@ class PostViewsTests(TestCase):
             'Новая запись появилась в ленте того,'
             'кто на неё не подписан'
         )
+
+    def test_timeline_filled_on_write(self):
+        """Пост раскладывается по лентам подписчиков при создании,
+        а при отписке записи автора из ленты удаляются"""
+        user = PostViewsTests.user
+        author = PostViewsTests.user_author
+        PostViewsTests.authorized_client.get(
+            reverse(PROFILE_FOLLOW, kwargs={'username': author.username})
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=user).count(),
+            AMOUNT_TEST_POSTS,
+            'Лента не заполнилась постами автора при подписке'
+        )
+        new_post = Post.objects.create(author=author, text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=user, post=new_post).exists(),
+            'Новый пост не попал в ленту подписчика'
+        )
+        PostViewsTests.authorized_client.get(
+            reverse(PROFILE_UNFOLLOW, kwargs={'username': author.username})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=user).exists(),
+            'Записи автора остались в ленте после отписки'
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_hot_author_posts_merged_on_read(self):
+        """Посты популярного автора не копируются в ленты ни при
+        подписке, ни при публикации, но попадают в ленту при чтении"""
+        author = PostViewsTests.user_author
+        Follow.objects.create(user=PostViewsTests.new_user, author=author)
+        cache.clear()
+        Follow.objects.create(user=PostViewsTests.user, author=author)
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=PostViewsTests.user).exists(),
+            'Посты популярного автора скопированы в ленту при подписке'
+        )
+        new_post = Post.objects.create(author=author, text='Новый пост')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists(),
+            'Пост популярного автора разложен по лентам'
+        )
+        response = PostViewsTests.authorized_client.get(reverse(FOLLOW_INDEX))
+        self.assertEqual(
+            response.context['page_obj'][0],
+            new_post,
+            'Пост популярного автора не попал в ленту подписчика'
+        )
+        self.assertEqual(len(response.context['page_obj']), POSTS_ON_PAGE)
+
+    def test_post_cards_cached(self):
+        """Карточки постов берутся из кэша на всех лентах,
+        а после редактирования поста перерисовываются"""
+        post = PostViewsTests.post
+        PostViewsTests.author_client.get(
+            reverse(GROUP_LIST, kwargs={'slug': PostViewsTests.group.slug})
+        )
+        cache_stats.reset()
+        PostViewsTests.author_client.get(
+            reverse(GROUP_LIST, kwargs={'slug': PostViewsTests.group.slug})
+        )
+        self.assertEqual(
+            cache_stats.snapshot()['post_card'],
+            {'hits': POSTS_ON_PAGE, 'misses': 0},
+            'Карточки постов не взяты из кэша'
+        )
+        PostViewsTests.author_client.post(
+            reverse(POST_EDITE, kwargs={'post_id': post.id}),
+            data={
+                'text': 'Отредактированный текст',
+                'group': PostViewsTests.group.id,
+            },
+        )
+        cache_stats.reset()
+        response = PostViewsTests.author_client.get(
+            reverse(GROUP_LIST, kwargs={'slug': PostViewsTests.group.slug})
+        )
+        self.assertContains(response, 'Отредактированный текст')
+        self.assertEqual(cache_stats.snapshot()['post_card']['misses'], 1)
+        self.assertNotContains(response, 'все записи группы')
+
+    def test_post_cards_follow_author_and_group(self):
+        """Карточки перерисовываются после переименования автора
+        и группы"""
+        self.client.get(reverse(INDEX))
+        author = User.objects.get(pk=PostViewsTests.user_author.pk)
+        author.first_name, author.last_name = 'Новое', 'Имя'
+        author.save()
+        group = Group.objects.get(pk=PostViewsTests.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        response = self.client.get(reverse(INDEX))
+        self.assertContains(response, 'Автор: Новое Имя', POSTS_ON_PAGE)
+        self.assertContains(
+            response, 'все записи группы Новое название', POSTS_ON_PAGE
+        )
+
+    def test_thumbnail_placeholder_until_generated(self):
+        """Пока миниатюра не создана, вместо неё показывается заглушка,
+        а после фоновой генерации страница отдаёт готовую миниатюру"""
+        post = PostViewsTests.post
+        url = reverse(POST_DETAIL, kwargs={'post_id': post.id})
+        response = self.client.get(url)
+        self.assertContains(response, 'Картинка обрабатывается')
+        generate_thumbnails(post.image.name)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Картинка обрабатывается')
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_thumbnails_for_posts_created_elsewhere(self):
+        """Миниатюры ставятся в очередь при любом сохранении поста
+        с новой картинкой, а посты из bulk_create догоняет команда"""
+        post = PostViewsTests.post
+        with mock.patch('posts.signals.queue_thumbnails') as queue:
+            Post.objects.create(
+                author=PostViewsTests.user_author, text='Пост из админки',
+                image=post.image.name,
+            )
+            post.text = 'Новый текст'
+            post.save()
+        self.assertEqual(queue.call_count, 1)
+        call_command('generate_thumbnails', stdout=StringIO())
+        response = self.client.get(
+            reverse(POST_DETAIL, kwargs={'post_id': post.id})
+        )
+        self.assertNotContains(response, 'Картинка обрабатывается')
+
+    @override_settings(THUMBNAIL_FORMATS=('PNG', 'JPEG'))
+    def test_thumbnail_picture_sources(self):
+        """Миниатюры создаются в нескольких ширинах и форматах,
+        а страница отдаёт их через <picture> и srcset"""
+        post = PostViewsTests.post
+        generate_thumbnails(post.image.name)
+        response = self.client.get(
+            reverse(POST_DETAIL, kwargs={'post_id': post.id})
+        )
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/png"')
+        for width in (*settings.THUMBNAIL_WIDTHS, 960):
+            self.assertContains(response, f'.png {width}w')
+            self.assertContains(response, f'.jpg {width}w')
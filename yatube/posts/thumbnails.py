@@ -0,0 +1,267 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import django
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.helpers import serialize, tokey
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from posts.cache import POST_STREAM, bump_feed_generation, bump_versions
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+PICTURE_IDENTITY = 'picture'
+FAILED_MESSAGE = 'Не удалось создать миниатюры для %s'
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+
+def output_formats():
+    """Форматы из THUMBNAIL_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    *modern, fallback = settings.THUMBNAIL_FORMATS
+    return [name for name in modern if name in Image.SAVE] + [fallback]
+
+
+def picture_variants():
+    """Все размеры и форматы, в которых создаются миниатюры.
+
+    Каждый псевдоним из THUMBNAIL_ALIASES дополнительно уменьшается до
+    ширин THUMBNAIL_WIDTHS с сохранением пропорций.
+    """
+    formats = output_formats()
+    variants = []
+    for alias, (geometry_string, options) in (
+        settings.THUMBNAIL_ALIASES.items()
+    ):
+        width, height = parse_geometry(geometry_string)
+        widths = sorted(
+            {w for w in settings.THUMBNAIL_WIDTHS if w < width} | {width}
+        )
+        for variant_width in widths:
+            variant_geometry = '%sx%s' % (
+                variant_width, round(height * variant_width / width)
+            )
+            for format_ in formats:
+                variants.append((
+                    (alias, format_, variant_width),
+                    variant_geometry,
+                    dict(options, format=format_),
+                ))
+    return variants
+
+
+class PregeneratingBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не создаёт миниатюры по запросу.
+
+    Страница только ищет готовую миниатюру в хранилище ключей, а все
+    размеры картинки создаются фоновым процессом за одно декодирование.
+    """
+
+    def _normalize_options(self, source, options):
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        format_ = options['format']
+        key = tokey(source.key, geometry_string, serialize(options))
+        return '%s%s/%s/%s.%s' % (
+            sorl_settings.THUMBNAIL_PREFIX, key[:2], key[2:4], key,
+            EXTENSIONS.get(format_, format_.lower()),
+        )
+
+    def get_picture(self, file_, alias):
+        """Готовые миниатюры картинки: {формат: [[ширина, имя], ...]}."""
+        pictures = default.kvstore._get(
+            ImageFile(file_).key, identity=PICTURE_IDENTITY
+        )
+        return (pictures or {}).get(alias)
+
+    def render_thumbnails(self, source, variants):
+        """Создаёт файлы всех размеров, не обращаясь к базе данных.
+
+        Картинка декодируется один раз, все размеры и форматы
+        получаются из уже загруженного изображения. Если исходный файл
+        успели удалить, оставшиеся размеры не создаются.
+        """
+        source_image = default.engine.get_image(source)
+        rendered = []
+        try:
+            source_size = default.engine.get_image_size(source_image)
+            image_info = default.engine.get_image_info(source_image)
+            for key, geometry_string, options in variants:
+                if not source.exists():
+                    break
+                options = self._normalize_options(source, options)
+                name = self._get_thumbnail_filename(
+                    source, geometry_string, options
+                )
+                thumbnail = ImageFile(name, source.storage)
+                options['image_info'] = image_info
+                self._create_thumbnail(
+                    source_image, geometry_string, options, thumbnail
+                )
+                rendered.append((key, thumbnail.name, thumbnail.size))
+        finally:
+            default.engine.cleanup(source_image)
+        return source_size, rendered
+
+    def register_thumbnails(self, name, source_size, rendered):
+        source = ImageFile(name)
+        source.set_size(source_size)
+        source = default.kvstore.get_or_set(source)
+        pictures = {}
+        for (alias, format_, width), thumbnail_name, size in rendered:
+            thumbnail = ImageFile(thumbnail_name, default.storage)
+            thumbnail.set_size(size)
+            default.kvstore.set(thumbnail, source)
+            pictures.setdefault(alias, {}).setdefault(format_, []).append(
+                [width, thumbnail_name]
+            )
+        default.kvstore._set(source.key, pictures, identity=PICTURE_IDENTITY)
+
+
+backend = PregeneratingBackend()
+
+
+def render_for_image(name, media_root):
+    storage = FileSystemStorage(location=media_root)
+    return backend.render_thumbnails(
+        ImageFile(name, storage), picture_variants()
+    )
+
+
+def thumbnails_ready(name, source_size, rendered):
+    """update() не шлёт сигналов, поэтому версии страниц с постами
+    картинки увеличиваются здесь: иначе ETag не изменится."""
+    backend.register_thumbnails(name, source_size, rendered)
+    posts = Post.objects.filter(image=name)
+    posts.update(updated=timezone.now())
+    for pk, author_id, group_id in posts.values_list(
+        'pk', 'author_id', 'group_id'
+    ):
+        bump_versions(
+            ('post', pk), ('author', author_id), ('group', group_id)
+        )
+    bump_versions(POST_STREAM)
+    bump_feed_generation()
+
+
+def generate_thumbnails(name):
+    thumbnails_ready(name, *render_for_image(name, settings.MEDIA_ROOT))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def _submit(name):
+    """Ошибка миниатюр не отменяет сохранения поста, только пишется
+    в журнал: страница покажет заглушку."""
+    if not settings.THUMBNAIL_WORKERS:
+        try:
+            generate_thumbnails(name)
+        except Exception:
+            logger.exception(FAILED_MESSAGE, name)
+        return
+
+    def done(future):
+        try:
+            thumbnails_ready(name, *future.result())
+        except Exception:
+            logger.exception(FAILED_MESSAGE, name)
+
+    future = _get_executor().submit(
+        render_for_image, name, settings.MEDIA_ROOT
+    )
+    future.add_done_callback(done)
+
+
+def queue_thumbnails(post):
+    if post.image:
+        name = post.image.name
+        transaction.on_commit(lambda: _submit(name))
+
+
+def missing_thumbnails():
+    """Картинки постов, для которых миниатюры ещё не созданы: посты
+    из bulk_create (загрузка, seed) сигналов не шлют."""
+    names = Post.objects.exclude(image='').order_by().values_list(
+        'image', flat=True
+    ).distinct()
+    for name in names.iterator():
+        if any(
+            backend.get_picture(name, alias) is None
+            for alias in settings.THUMBNAIL_ALIASES
+        ):
+            yield name
+
+
+def backfill_thumbnails(progress=None):
+    """Создаёт недостающие миниатюры; картинки без файла или битые
+    пропускаются. Возвращает число обработанных картинок."""
+    names = [
+        name for name in missing_thumbnails()
+        if os.path.exists(os.path.join(settings.MEDIA_ROOT, name))
+    ]
+    if settings.THUMBNAIL_WORKERS:
+        results = _get_executor().map(
+            _render_or_none, names, repeat(settings.MEDIA_ROOT)
+        )
+    else:
+        results = (
+            _render_or_none(name, settings.MEDIA_ROOT) for name in names
+        )
+    count = 0
+    for name, result in zip(names, results):
+        if result is None:
+            continue
+        thumbnails_ready(name, *result)
+        count += 1
+        if progress:
+            progress(name)
+    return count
+
+
+def _render_or_none(name, media_root):
+    """render_for_image, который не прерывает догонялку на битой
+    картинке."""
+    try:
+        return render_for_image(name, media_root)
+    except Exception:
+        logger.exception(FAILED_MESSAGE, name)
+        return None
@@ -0,0 +1,115 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from posts.models import Follow, Post, Profile, TimelineEntry
+
+HOT_AUTHORS_KEY = 'timeline:hot_authors'
+TIMELINE_ORDERING = ('-feed_date', '-feed_post')
+
+
+def hot_author_ids():
+    """Авторы, чьи посты не раскладываются по лентам подписчиков."""
+    def collect():
+        return frozenset(
+            Profile.objects.filter(
+                followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('user_id', flat=True)
+        )
+    return cache.get_or_set(
+        HOT_AUTHORS_KEY, collect, settings.TIMELINE_HOT_AUTHORS_TIMEOUT
+    )
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post):
+    if post.author_id in hot_author_ids():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Копирует посты автора в ленту нового подписчика; посты
+    популярного автора лента читает напрямую, их не копируем."""
+    if author_id in hot_author_ids():
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).order_by().values_list('id', 'pub_date')
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты одной транзакцией: посты всех авторов
+    подписчика читаются одним запросом. Посты популярных авторов лента
+    и так читает напрямую, их в ленты не копируем."""
+    follows = Follow.objects.exclude(
+        author_id__in=hot_author_ids()
+    ).order_by('user_id')
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        entries.delete()
+        pairs = follows.values_list('user_id', 'author_id').iterator()
+        for user_id, authors in groupby(pairs, key=itemgetter(0)):
+            posts = Post.objects.filter(
+                author_id__in=[author_id for _, author_id in authors]
+            ).order_by().values_list('id', 'pub_date')
+            _insert(
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id, pub_date=pub_date
+                )
+                for post_id, pub_date in posts.iterator()
+            )
+
+
+def follow_feed(user):
+    """Лента подписок пользователя.
+
+    Обычно это один диапазон по индексу (user, -pub_date) таблицы лент.
+    Посты популярных авторов в ленты не копируются, поэтому при
+    подписке на них лента собирается запросом по постам напрямую.
+    """
+    hot_authors = Follow.objects.filter(
+        user=user, author_id__in=hot_author_ids()
+    ).values_list('author_id', flat=True)
+    if not hot_authors.exists():
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        )
+    timeline = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(id__in=timeline) | Q(author_id__in=hot_authors)
+    ).annotate(
+        feed_date=F('pub_date'),
+        feed_post=F('id'),
+    )
@@ -0,0 +1,270 @@
+"""Выгрузка и загрузка постов, комментариев, подписок и групп в NDJSON.
+
+Каждая строка — одна запись: {"model": "post", "id": 1, ...}. Модели
+идут в порядке зависимостей, внутри модели — по id. Авторы и
+подписчики записаны именами пользователей, остальные связи — id.
+"""
+import datetime
+import json
+import os
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from posts import timeline
+from posts.cache import bump_feed_generation
+from posts.counters import recount_all
+from posts.models import Comment, Follow, Group, Post, User
+from posts.thumbnails import backfill_thumbnails
+
+USERNAMES_PER_QUERY = 500
+IDS_PER_QUERY = 500
+# How many occupied ids the import error lists.
+REPORTED_IDS = 10
+
+MODELS = {
+    'group': (Group, (
+        ('id', 'id'), ('title', 'title'), ('slug', 'slug'),
+        ('description', 'description'),
+    )),
+    'post': (Post, (
+        ('id', 'id'), ('text', 'text'), ('pub_date', 'pub_date'),
+        ('updated', 'updated'), ('author', 'author__username'),
+        ('group', 'group_id'), ('image', 'image'),
+    )),
+    'comment': (Comment, (
+        ('id', 'id'), ('post', 'post_id'), ('author', 'author__username'),
+        ('text', 'text'), ('created', 'created'),
+    )),
+    'follow': (Follow, (
+        ('id', 'id'), ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+USER_FIELDS = {'author', 'user'}
+REFERENCES = {'group': Group, 'post': Post}
+DATE_FIELDS = {'pub_date', 'updated', 'created'}
+
+
+def _encode(value):
+    # DjangoJSONEncoder would cut datetimes to milliseconds.
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def write_checkpoint(path, state):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def export_rows(write, chunk_size, start=None, checkpoint=None):
+    """Пишет записи всех моделей строками NDJSON через write.
+
+    Строки читаются итератором по chunk_size, а не всей таблицей.
+    После каждой пачки вызывается checkpoint(model, last_id, rows);
+    start={'model': ..., 'last_id': ...} продолжает с такой точки.
+    """
+    names = list(MODELS)
+    if start:
+        names = names[names.index(start['model']):]
+    for name in names:
+        model, fields = MODELS[name]
+        queryset = model.objects.order_by('pk').values_list(
+            *(lookup for _, lookup in fields)
+        )
+        if start and name == start['model']:
+            queryset = queryset.filter(pk__gt=start['last_id'])
+        rows = 0
+        last_id = start['last_id'] if start and name == start['model'] else 0
+        for values in queryset.iterator(chunk_size=chunk_size):
+            record = {'model': name}
+            record.update(zip((key for key, _ in fields), values))
+            write(json.dumps(
+                record, default=_encode, ensure_ascii=False
+            ) + '\n')
+            rows += 1
+            last_id = record['id']
+            if checkpoint and rows % chunk_size == 0:
+                checkpoint(name, last_id, rows)
+        if checkpoint:
+            checkpoint(name, last_id, rows)
+
+
+@contextmanager
+def keep_timestamps():
+    """Даты из выгрузки вместо auto_now и auto_now_add при вставке."""
+    fields = [
+        field for model, _ in MODELS.values()
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _user_ids(usernames):
+    """id пользователей по именам; недостающие создаются без пароля."""
+    usernames = list(usernames)
+    ids = {}
+    for start in range(0, len(usernames), USERNAMES_PER_QUERY):
+        part = usernames[start:start + USERNAMES_PER_QUERY]
+        ids.update(
+            User.objects.filter(username__in=part)
+            .values_list('username', 'id')
+        )
+    missing = [username for username in usernames if username not in ids]
+    if missing:
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=username, password=password)
+             for username in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(_user_ids(missing))
+    return ids
+
+
+def _instance(model, record, user_ids):
+    values = {}
+    for key, value in record.items():
+        if key == 'model':
+            continue
+        if key in USER_FIELDS:
+            values[f'{key}_id'] = user_ids[value]
+        elif key in DATE_FIELDS:
+            values[key] = parse_datetime(value)
+        elif key in ('group', 'post'):
+            values[f'{key}_id'] = value
+        else:
+            values[key] = value
+    return model(**values)
+
+
+def _existing_ids(model, ids):
+    existing = set()
+    for start in range(0, len(ids), IDS_PER_QUERY):
+        existing.update(
+            model.objects.filter(pk__in=ids[start:start + IDS_PER_QUERY])
+            .values_list('pk', flat=True)
+        )
+    return existing
+
+
+def _listed(ids):
+    ids = sorted(ids)
+    listed = ', '.join(map(str, ids[:REPORTED_IDS]))
+    if len(ids) > REPORTED_IDS:
+        listed += ', ...'
+    return f'{listed} (всего {len(ids)})'
+
+
+def _check_ids(name, records):
+    """Занятые id и ссылки на несуществующие группы и посты: SQLite
+    проверяет внешние ключи только при фиксации транзакции."""
+    model, _ = MODELS[name]
+    occupied = _existing_ids(model, [record['id'] for record in records])
+    if occupied:
+        raise ValueError(
+            f'{name}: в базе уже есть записи с id {_listed(occupied)}'
+        )
+    for key, target in REFERENCES.items():
+        ids = list({
+            record[key] for record in records
+            if record.get(key) is not None
+        })
+        missing = set(ids) - _existing_ids(target, ids)
+        if missing:
+            raise ValueError(
+                f'{name}: нет записей {key} с id {_listed(missing)}'
+            )
+
+
+def _save(name, records, batch_size):
+    """Сохраняет пачку одной транзакцией; занятые id, ссылки на
+    несуществующие записи и другие нарушения целостности отменяют её
+    с ValueError."""
+    model, _ = MODELS[name]
+    usernames = {
+        record[key] for record in records for key in USER_FIELDS
+        if key in record
+    }
+    try:
+        with transaction.atomic():
+            _check_ids(name, records)
+            user_ids = _user_ids(usernames)
+            model.objects.bulk_create(
+                [_instance(model, record, user_ids) for record in records],
+                batch_size=batch_size,
+            )
+    except IntegrityError as exc:
+        raise ValueError(f'{name}: {exc}') from exc
+
+
+def import_rows(file, batch_size, chunk_size, checkpoint=None):
+    """Загружает NDJSON из бинарного файла с его текущей позиции.
+
+    Записи одной модели копятся до chunk_size и сохраняются одной
+    транзакцией через bulk_create пачками по batch_size. После
+    транзакции вызывается checkpoint(model, offset, rows), где
+    offset — позиция в файле сразу за сохранёнными строками. Запись
+    с уже занятым id или ссылкой на несуществующую запись
+    останавливает загрузку с ValueError, а не пропускается молча.
+    """
+    name = None
+    records = []
+    rows = 0
+
+    def flush(offset):
+        nonlocal rows
+        if records:
+            _save(name, records, batch_size)
+            rows += len(records)
+            records.clear()
+            if checkpoint:
+                checkpoint(name, offset, rows)
+
+    with keep_timestamps():
+        offset = file.tell()
+        for line in iter(file.readline, b''):
+            if not line.strip():
+                offset = file.tell()
+                continue
+            record = json.loads(line)
+            if record['model'] not in MODELS:
+                raise ValueError(f'Неизвестная модель: {record["model"]}')
+            if record['model'] != name or len(records) >= chunk_size:
+                flush(offset)
+                name = record['model']
+            records.append(record)
+            offset = file.tell()
+        flush(offset)
+    return rows
+
+
+def finish_import(batch_size=1000):
+    """bulk_create не шлёт сигналы: ленты, счётчики, миниатюры и кэш
+    собираются заново."""
+    timeline.rebuild()
+    recount_all(batch_size)
+    backfill_thumbnails()
+    bump_feed_generation()
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from posts import views
+from posts import feeds, sitemaps, views
 
 app_name = 'posts'
 
@@ -11,15 +11,18 @@ POST_DETAIL = 'posts:post_detail'
 POST_CREATE = 'posts:post_create'
 POST_EDITE = 'posts:post_edit'
 ADD_COMMENT = 'posts:add_comment'
+COMMENT_LIST = 'posts:comment_list'
 PROFILE_FOLLOW = 'posts:profile_follow'
 PROFILE_UNFOLLOW = 'posts:profile_unfollow'
 FOLLOW_INDEX = 'posts:follow_index'
+SEARCH = 'posts:search'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -27,6 +30,11 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -39,4 +47,24 @@ urlpatterns = [
         name='profile_unfollow'
     ),
     path('posts/<int:post_id>/delete/', views.post_delete, name='post_delete'),
+    path('feeds/rss/', feeds.posts_rss, name='posts_rss'),
+    path('feeds/atom/', feeds.posts_atom, name='posts_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.profile_rss,
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.profile_atom,
+        name='profile_atom'
+    ),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<slug:section>-<int:shard>.xml',
+        sitemaps.sitemap_shard,
+        name='sitemap_shard'
+    ),
 ]
@@ -1,24 +1,63 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
+from posts.cache import cache_feed_page, conditional_page, object_versions
 from posts.forms import CommentForm, PostForm
 from posts.models import Follow, Group, Post, User
+from posts.paginator import COMMENT_ORDERING, POST_ORDERING, CursorPaginator
+from posts.search import SEARCH_ORDERING, search_posts
+from posts.timeline import TIMELINE_ORDERING, follow_feed
 
 POSTS_ON_PAGE = 10
+COMMENTS_ON_PAGE = 20
 
 
-def pagination(post_list, request):
-    paginator = Paginator(post_list, POSTS_ON_PAGE)
+def pagination(post_list, request, ordering=POST_ORDERING):
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = Paginator(
+            post_list.order_by(*POST_ORDERING), POSTS_ON_PAGE
+        )
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(post_list, POSTS_ON_PAGE, ordering)
+    return paginator.get_page(request.GET.get('cursor'))
 
 
-@cache_page(20, key_prefix='index_page')
+def index_posts():
+    return Post.objects.select_related('author', 'group').all()
+
+
+def group_post_list(group):
+    return group.posts.select_related('author')
+
+
+def profile_post_list(author):
+    return author.posts.select_related('group')
+
+
+def follow_post_list(user):
+    return follow_feed(user).select_related('author', 'group')
+
+
+def post_comments(post):
+    return post.comments.select_related('author')
+
+
+def comments_page(post, cursor=None):
+    paginator = CursorPaginator(
+        post_comments(post), COMMENTS_ON_PAGE, COMMENT_ORDERING
+    )
+    return paginator.get_page(cursor)
+
+
+@cache_feed_page(settings.INDEX_CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('author', 'group').all()
+    post_list = index_posts()
     page_obj = pagination(post_list, request)
     context = {
         'page_obj': page_obj,
@@ -26,13 +65,42 @@ def index(request):
     return render(request, template, context)
 
 
+def _validator_row(queryset, *fields):
+    """Поля объекта одним запросом по индексу; None, если его нет."""
+    return next(iter(queryset.order_by().values_list(*fields)[:1]), None)
+
+
+def group_validators(request, slug):
+    row = _validator_row(Group.objects.filter(slug=slug), 'id')
+    if row is None:
+        return None
+    group_id, = row
+    return (('group', group_id),)
+
+
+def profile_validators(request, username):
+    row = _validator_row(User.objects.filter(username=username), 'id')
+    if row is None:
+        return None
+    author_id, = row
+    return (('author', author_id),)
+
+
+def post_validators(request, post_id):
+    row = _validator_row(
+        Post.objects.filter(id=post_id), 'author_id', 'group_id'
+    )
+    if row is None:
+        return None
+    author_id, group_id = row
+    return (('post', post_id), ('author', author_id), ('group', group_id))
+
+
+@conditional_page(group_validators)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(
-        Group.objects.prefetch_related('posts'),
-        slug=slug
-    )
-    post_list = group.posts.all()
+    group = get_object_or_404(Group, slug=slug)
+    post_list = group_post_list(group)
     page_obj = pagination(post_list, request)
     context = {
         'group': group,
@@ -41,13 +109,14 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_page(profile_validators)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(
-        User.objects.prefetch_related('posts'),
+        User.objects.select_related('profile'),
         username=username
     )
-    post_list = author.posts.all()
+    post_list = profile_post_list(author)
     page_obj = pagination(post_list, request)
     context = {
         'author': author,
@@ -62,24 +131,53 @@ def profile(request, username):
     return render(request, template, context)
 
 
+@conditional_page(post_validators)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
     post = get_object_or_404(
-        Post.objects.prefetch_related('author', 'group'),
+        Post.objects.select_related('author__profile', 'group'),
         id=post_id
     )
-    comments = post.comments.all()
     form = CommentForm(
         request.POST or None
     )
     context = {
         'post': post,
-        'comments': comments,
+        # Read only when the cached first page of comments is stale.
+        'comments': SimpleLazyObject(lambda: comments_page(post)),
+        'comments_version': '-'.join(
+            str(version) for version in object_versions(('post', post.pk))
+        ),
+        'comments_cache_timeout': settings.COMMENTS_CACHE_TIMEOUT,
         'form': form
     }
     return render(request, template, context)
 
 
+def comment_list(request, post_id):
+    """Следующая страница комментариев фрагментом HTML для подгрузки."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(query).select_related('author', 'group')
+    paginator = CursorPaginator(post_list, POSTS_ON_PAGE, SEARCH_ORDERING)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, template, context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
@@ -116,7 +214,7 @@ def post_edit(request, post_id):
     )
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            form.save(commit=False).save_without_counters()
             return redirect('posts:post_detail', post.id)
     context = {
         'is_edit': True,
@@ -127,11 +225,8 @@ def post_edit(request, post_id):
 
 @login_required
 def post_delete(request, post_id):
-    post = get_object_or_404(
-        Post.objects.prefetch_related('author'),
-        pk=post_id
-    )
-    if request.user == post.author:
+    post = get_object_or_404(Post, pk=post_id)
+    if request.user.pk == post.author_id:
         post.delete()
     return redirect('posts:profile', request.user.username)
 
@@ -139,10 +234,7 @@ def post_delete(request, post_id):
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(
-        Post.objects.select_related('author', 'group'),
-        id=post_id
-    )
+    post = get_object_or_404(Post, id=post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
@@ -154,10 +246,8 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    post_list = Post.objects.prefetch_related('author', 'group').filter(
-        author__following__user=request.user
-    )
-    page_obj = pagination(post_list, request)
+    post_list = follow_post_list(request.user)
+    page_obj = pagination(post_list, request, TIMELINE_ORDERING)
     context = {
         'page_obj': page_obj,
     }
@@ -166,10 +256,7 @@ def follow_index(request):
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(
-        User.objects.prefetch_related('posts'),
-        username=username
-    )
+    author = get_object_or_404(User, username=username)
     if (
             author != request.user
             and not Follow.objects.filter(
@@ -183,16 +270,6 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(
-        User.objects.prefetch_related('posts'),
-        username=username
-    )
-    if (
-            author != request.user
-            and Follow.objects.filter(
-                user=request.user,
-                author=author
-            ).exists()
-    ):
-        Follow.objects.get(user=request.user, author=author).delete()
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
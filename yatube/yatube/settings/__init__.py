@@ -0,0 +1,17 @@
+"""Профиль настроек выбирается переменной окружения DJANGO_ENV."""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.getenv('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'dev':
+    from .dev import *
+elif DJANGO_ENV == 'prod':
+    from .prod import *
+elif DJANGO_ENV == 'test':
+    from .test import *
+else:
+    raise ImproperlyConfigured(
+        f'DJANGO_ENV должен быть dev, prod или test, а не {DJANGO_ENV!r}.'
+    )
@@ -0,0 +1,289 @@
+import os
+import tempfile
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Settings shared by every profile. The dev and prod modules of this
+# package extend them; yatube.settings picks one by DJANGO_ENV.
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'wg4_&83xzh^0i!(w@sc$iypjh8lqb#p2oye^ylr6bnuoq7*n%y'
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'bench.apps.BenchConfig',
+    'api.apps.ApiConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryLogMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'core.template_backend.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# Read replicas: reads of REPLICATED_APPS models go to a random alias from
+# DATABASE_REPLICAS. SQLITE_REPLICAS local SQLite copies of the primary
+# stand in for real replicas; `manage.py refresh_replicas` refreshes them
+# with the backup API. A user who wrote reads from the primary for the
+# next REPLICA_STICKY_SECONDS (a cookie), so their changes show at once.
+for number in range(1, int(os.getenv('SQLITE_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICATED_APPS = ['posts']
+REPLICA_STICKY_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Applied to every new SQLite connection. WAL lets readers work while a
+# post or comment is being written; NORMAL sync is safe with WAL and only
+# risks the last transactions on power loss. Negative cache_size is KiB.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+}
+# Transactions take the write lock up front (BEGIN IMMEDIATE) so two
+# writers never deadlock upgrading their read locks. None keeps SQLite's
+# deferred transactions.
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+STATIC_URL = '/static/'
+
+# One SQLite file in shared memory (/dev/shm) serves every worker on the
+# host, so cached pages, fragments and version counters are shared.
+# MAX_BYTES caps the stored keys and values; least recently read entries
+# are evicted beyond it. In front of it each process keeps its
+# MAX_ENTRIES most recently read entries, dropped through a change log
+# kept in the shared cache at the start of every request.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.backends.tiered.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.backends.cache.SQLiteCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_BYTES': int(os.getenv('CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+        },
+    }
+}
+
+# Feed pages are invalidated by a generation counter bumped on every post
+# change, so they may be kept for hours.
+INDEX_CACHE_TIMEOUT = 6 * 60 * 60
+FEED_REBUILD_LOCK_TIMEOUT = 30
+POST_CARD_CACHE_TIMEOUT = 24 * 60 * 60
+# The first page of comments is cached per post version, which every new
+# or deleted comment bumps.
+COMMENTS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Post, group and profile pages answer conditional GETs with 304. A
+# reverse proxy may serve an anonymous copy for PAGE_PROXY_MAX_AGE
+# seconds before revalidating it; browsers always revalidate.
+PAGE_PROXY_MAX_AGE = 60
+
+# RSS and Atom feeds list the latest SYNDICATION_ITEMS posts. A built
+# feed is cached under its ETag, so any post change makes a new key.
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Sitemap shards cover id ranges of SITEMAP_SHARD_SIZE, the protocol
+# limit. build_sitemaps writes them gzipped to SITEMAP_ROOT, which the
+# web server should serve at SITEMAP_URL.
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL', 'http://localhost:8000')
+
+# Per-view request metrics served in the Prometheus text format on
+# /metrics/ to requests with an "Authorization: Bearer <METRICS_TOKEN>"
+# header; without a token the endpoint is closed to everyone. Each process
+# dumps its own counters into METRICS_DIR at most once per
+# METRICS_FLUSH_INTERVAL seconds and the endpoint sums the dumps of all
+# processes; clear the directory when the server is redeployed. With
+# METRICS_DIR set to None the counters stay in the serving process.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+)
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Database queries slower than QUERYLOG_SLOW_MS (None disables the check)
+# are logged on every request. A QUERYLOG_SAMPLE_RATE share of requests is
+# also checked for the same SQL shape executed QUERYLOG_REPEAT_THRESHOLD or
+# more times, which is how N+1 lookups show up. Records are JSON lines in
+# QUERYLOG_FILE; `manage.py querystats` summarizes them.
+QUERYLOG_SLOW_MS = float(os.getenv('QUERYLOG_SLOW_MS', 100))
+QUERYLOG_SAMPLE_RATE = float(os.getenv('QUERYLOG_SAMPLE_RATE', 0.1))
+QUERYLOG_REPEAT_THRESHOLD = 5
+QUERYLOG_FILE = os.getenv(
+    'QUERYLOG_FILE', os.path.join(tempfile.gettempdir(), 'yatube-queries.log')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'querylog': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': QUERYLOG_FILE,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.queries': {
+            'handlers': ['querylog'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Thumbnail sizes used by the templates. They are generated by
+# THUMBNAIL_WORKERS background processes right after a post is saved,
+# or inline when THUMBNAIL_WORKERS is 0.
+THUMBNAIL_ALIASES = {
+    'post': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Every alias is also rendered at the narrower THUMBNAIL_WIDTHS and in each
+# of THUMBNAIL_FORMATS the installed Pillow can encode. The last format is
+# the <img> fallback and must always be supported.
+THUMBNAIL_WIDTHS = (320, 640)
+THUMBNAIL_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+THUMBNAIL_SIZES = '(max-width: 992px) 100vw, 960px'
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+
+# Posts of authors with more followers than TIMELINE_FANOUT_LIMIT are not
+# copied into the followers' timelines and are merged into the feed on read.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_HOT_AUTHORS_TIMEOUT = 5 * 60
+# SQLite allows at most 500 rows in one multi-row INSERT.
+TIMELINE_BATCH_SIZE = 500
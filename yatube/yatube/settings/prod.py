@@ -0,0 +1,48 @@
+import os
+
+from .base import *
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv(
+    'DJANGO_ALLOWED_HOSTS', ','.join(ALLOWED_HOSTS)
+).split(',')
+
+# Templates are parsed once per process instead of on every render.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Keep database connections open between requests.
+DATABASES = {
+    alias: {
+        **database,
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', 600)),
+    }
+    for alias, database in DATABASES.items()
+}
+
+# Static files get content hashes in their names, so browsers may cache
+# them forever. Run collectstatic before starting the server.
+STATIC_ROOT = os.getenv(
+    'DJANGO_STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+)
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+)
+
+QUERYLOG_SAMPLE_RATE = float(os.getenv('QUERYLOG_SAMPLE_RATE', 0.01))
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+from .dev import *
+
+# Thumbnails render inline, so no worker is left writing into a
+# MEDIA_ROOT the test has already removed.
+THUMBNAIL_WORKERS = 0
+
+# Tests clear the cache; a private file per run keeps them away from the
+# cache of a server on the same host and is removed on exit.
+CACHES = {
+    **CACHES,
+    'shared': {
+        **CACHES['shared'],
+        'LOCATION': os.path.join(
+            tempfile.gettempdir(), f'yatube-cache-test-{os.getpid()}.sqlite3'
+        ),
+        'OPTIONS': {**CACHES['shared']['OPTIONS'], 'TEMPORARY': True},
+    },
+}